@@ -0,0 +1,97 @@
+# Loading a large mesh: building and uploading it in one go on the GL thread versus
+# core.geometry_loader.GeometryLoader (build in a worker, upload a byte budget per frame).
+# Reports the longest time the GL thread is blocked in one frame.
+# Needs EGL (e.g. Mesa llvmpipe); run from the repository root:
+# python benchmarks/geometry_loader_benchmark.py
+import sys
+import time
+from pathlib import Path
+
+import gl_context
+import OpenGL.GL as GL
+import numpy as np
+
+package_dir = str(Path(__file__).resolve().parents[1])
+# Add the package directory into sys.path if necessary
+if package_dir not in sys.path:
+    sys.path.insert(0, package_dir)
+
+from core.geometry_loader import GeometryLoader
+from core.gl_state import GLState
+from core.utils import Utils
+from core.vertex_array import VertexArray
+from core.vertex_layout import VertexLayout
+
+VERTEX_COUNT = 2_000_000
+FRAME_BUDGET = 4 * 1024 * 1024
+
+vs_code = """
+    layout (location = 0) in vec3 vPosition;
+    layout (location = 1) in vec3 vColor;
+    out vec3 color;
+    void main()
+    {
+        gl_Position = vec4(vPosition, 1.0);
+        color = vColor;
+    }
+"""
+fs_code = """
+    in vec3 color;
+    out vec4 fragColor;
+    void main()
+    {
+        fragColor = vec4(color, 1.0);
+    }
+"""
+
+vertex_layout = VertexLayout([("vPosition", "vec3"), ("vColor", "vec3")])
+
+
+def build_mesh(vertex_count):
+    rng = np.random.default_rng(0)
+    positions = rng.random((vertex_count, 3)) * 2 - 1
+    colors = rng.random((vertex_count, 3))
+    indices = np.arange(vertex_count, dtype=np.uint32)
+    return vertex_layout.pack(vPosition=positions, vColor=colors), indices
+
+
+def run_blocking(program_ref):
+    start = time.perf_counter()
+    vertices, indices = build_mesh(VERTEX_COUNT)
+    buffer_ref = vertex_layout.upload_data(vertices)
+    index_buffer_ref = vertex_layout.upload_data(indices)
+    vertex_array = VertexArray(program_ref)
+    vertex_array.add_vertex_layout(vertex_layout, buffer_ref)
+    vertex_array.set_index_buffer(index_buffer_ref)
+    GL.glFinish()
+    return [time.perf_counter() - start]
+
+
+def run_loader(program_ref):
+    loader = GeometryLoader(frame_budget=FRAME_BUDGET)
+    mesh = loader.load(vertex_layout, program_ref, build_mesh, VERTEX_COUNT)
+    frame_times = []
+    while not mesh.is_resident:
+        start = time.perf_counter()
+        loader.update()
+        GL.glFinish()
+        frame_times.append(time.perf_counter() - start)
+        # the rest of a 60 Hz frame, during which the worker keeps building
+        time.sleep(max(0.0, 1 / 60 - frame_times[-1]))
+    loader.shutdown()
+    return frame_times
+
+
+def main():
+    gl_context.create_context()
+    program_ref = Utils.initialize_program(vs_code, fs_code)
+    GLState.use_program(program_ref)
+    print(f"{VERTEX_COUNT} vertices ({VERTEX_COUNT * vertex_layout.stride / 1e6:.0f} MB), "
+          f"budget {FRAME_BUDGET / 1e6:.1f} MB/frame")
+    for name, run in [("blocking load", run_blocking), ("GeometryLoader", run_loader)]:
+        frame_times = run(program_ref)
+        print(f"{name:<16}{len(frame_times):5d} frames, longest frame {max(frame_times) * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# Headless OpenGL context for benchmarks, created through EGL without a window
+# (on Linux without a GPU this gives Mesa's llvmpipe software renderer).
+# Import this module before OpenGL.GL so PyOpenGL picks the EGL platform.
+import ctypes
+import os
+
+os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+os.environ.setdefault("EGL_PLATFORM", "surfaceless")
+
+from OpenGL import EGL
+import OpenGL.GL as GL
+
+
+def create_context(major=4, minor=5, width=64, height=64):
+    """ Create a core-profile context with a small pbuffer surface and make it current """
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not EGL.eglInitialize(display, None, None):
+        raise Exception('Unable to initialize EGL')
+    config_attributes = (EGL.EGLint * 5)(
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_NONE)
+    config = EGL.EGLConfig()
+    config_count = EGL.EGLint()
+    EGL.eglChooseConfig(display, config_attributes, ctypes.pointer(config), 1, ctypes.pointer(config_count))
+    if config_count.value == 0:
+        raise Exception('No EGL config supports OpenGL rendering to a pbuffer')
+    surface_attributes = (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE)
+    surface = EGL.eglCreatePbufferSurface(display, config, surface_attributes)
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context_attributes = (EGL.EGLint * 7)(
+        EGL.EGL_CONTEXT_MAJOR_VERSION, major,
+        EGL.EGL_CONTEXT_MINOR_VERSION, minor,
+        EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+        EGL.EGL_NONE)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, context_attributes)
+    if not EGL.eglMakeCurrent(display, surface, surface, context):
+        raise Exception('Unable to make the EGL context current')
+    print("Renderer:", GL.glGetString(GL.GL_RENDERER).decode('utf-8'),
+          "| OpenGL", GL.glGetString(GL.GL_VERSION).decode('utf-8'))
+    return display, surface, context
@@ -0,0 +1,98 @@
+# Per-object GL calls of a frame drawing many objects that share a few programs and vertex arrays:
+# glUseProgram, glBindVertexArray and glEnable(GL_DEPTH_TEST) issued every time versus through
+# core.gl_state.GLState, which skips the calls whose value is already set.
+# Needs EGL (e.g. Mesa llvmpipe); run from the repository root:
+# python benchmarks/gl_state_benchmark.py
+import sys
+import time
+from pathlib import Path
+
+import gl_context
+import OpenGL.GL as GL
+import numpy as np
+
+package_dir = str(Path(__file__).resolve().parents[1])
+# Add the package directory into sys.path if necessary
+if package_dir not in sys.path:
+    sys.path.insert(0, package_dir)
+
+from core.gl_state import GLState
+from core.utils import Utils
+from core.vertex_array import VertexArray
+from core.vertex_layout import VertexLayout
+
+OBJECT_COUNT = 4096
+PROGRAM_COUNT = 4
+MESH_COUNT = 16
+FRAMES = 20
+# each case is timed REPEATS times and the fastest run is reported
+REPEATS = 5
+
+vs_code = """
+    layout (location = 0) in vec3 vPosition;
+    void main()
+    {
+        gl_Position = vec4(vPosition, 1.0);
+    }
+"""
+fs_code = """
+    out vec4 fragColor;
+    void main()
+    {
+        fragColor = vec4(1.0);
+    }
+"""
+
+
+def main():
+    gl_context.create_context()
+    programs = [Utils.initialize_program(vs_code, fs_code) for _ in range(PROGRAM_COUNT)]
+    vertex_layout = VertexLayout([("vPosition", "vec3")])
+    triangle = vertex_layout.from_interleaved([-0.01, -0.01, 0, 0.01, -0.01, 0, 0, 0.01, 0])
+    vertex_arrays = []
+    for _ in range(MESH_COUNT):
+        vertex_array = VertexArray(programs[0])
+        vertex_array.add_vertex_layout(vertex_layout, vertex_layout.upload_data(triangle))
+        vertex_arrays.append(vertex_array)
+    # objects sorted by program, then by mesh, as a renderer would submit them
+    rng = np.random.default_rng(0)
+    objects = sorted(zip(rng.integers(PROGRAM_COUNT, size=OBJECT_COUNT).tolist(),
+                         rng.integers(MESH_COUNT, size=OBJECT_COUNT).tolist()))
+    objects = [(programs[program], vertex_arrays[mesh].vao_ref) for program, mesh in objects]
+
+    # Bypasses GLState on purpose; the cache is invalidated before each case
+    def direct():
+        for program_ref, vao_ref in objects:
+            GL.glEnable(GL.GL_DEPTH_TEST)
+            GL.glUseProgram(program_ref)
+            GL.glBindVertexArray(vao_ref)
+            GL.glDrawArrays(GL.GL_TRIANGLES, 0, 3)
+
+    def cached():
+        for program_ref, vao_ref in objects:
+            GLState.enable(GL.GL_DEPTH_TEST)
+            GLState.use_program(program_ref)
+            GLState.bind_vertex_array(vao_ref)
+            GL.glDrawArrays(GL.GL_TRIANGLES, 0, 3)
+
+    print(f"{OBJECT_COUNT} objects, {PROGRAM_COUNT} programs, {MESH_COUNT} meshes")
+    for name, draw in [("GL calls every object", direct), ("through GLState", cached)]:
+        GLState.invalidate()
+        draw()
+        GL.glFinish()
+        best = float("inf")
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            for _ in range(FRAMES):
+                GLState.begin_frame()
+                draw()
+            GL.glFinish()
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:<24}{best / FRAMES * 1e3:8.2f} ms/frame")
+    GLState.begin_frame()
+    counters = GLState.last_frame_counters
+    print(f"GLState per frame: {counters['issued']} calls issued, {counters['skipped']} skipped")
+
+
+if __name__ == "__main__":
+    main()
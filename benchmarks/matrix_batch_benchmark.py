@@ -0,0 +1,68 @@
+# Compares the per-transform cost of the scalar Matrix.make_* methods
+# with their batched make_*s counterparts for different numbers of transforms.
+# Run from the repository root: python benchmarks/matrix_batch_benchmark.py
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+package_dir = str(Path(__file__).resolve().parents[1])
+# Add the package directory into sys.path if necessary
+if package_dir not in sys.path:
+    sys.path.insert(0, package_dir)
+
+from core.matrix import Matrix
+
+SIZES = [1, 1_000, 100_000]
+
+
+def time_per_item(function, n):
+    """ Best time of several runs, divided by the number of transforms built """
+    number = max(1, 10_000 // n)
+    repeat = 5 if n < 100_000 else 2
+    best = min(timeit.repeat(function, number=number, repeat=repeat))
+    return best / number / n
+
+
+def make_cases(n):
+    rng = np.random.default_rng(0)
+    positions = rng.random((n, 3)).astype(np.float32)
+    angles = rng.random(n).astype(np.float32)
+    scales = rng.random(n).astype(np.float32)
+    stack_a = Matrix.make_rotations_y(angles)
+    stack_b = Matrix.make_translations(positions)
+    return {
+        "translation": (
+            lambda: [Matrix.make_translation(*p) for p in positions],
+            lambda: Matrix.make_translations(positions)),
+        "rotation_x": (
+            lambda: [Matrix.make_rotation_x(a) for a in angles],
+            lambda: Matrix.make_rotations_x(angles)),
+        "rotation_y": (
+            lambda: [Matrix.make_rotation_y(a) for a in angles],
+            lambda: Matrix.make_rotations_y(angles)),
+        "rotation_z": (
+            lambda: [Matrix.make_rotation_z(a) for a in angles],
+            lambda: Matrix.make_rotations_z(angles)),
+        "scale": (
+            lambda: [Matrix.make_scale(s) for s in scales],
+            lambda: Matrix.make_scales(scales)),
+        "compose": (
+            lambda: [a @ b for a, b in zip(stack_a, stack_b)],
+            lambda: Matrix.compose(stack_a, stack_b)),
+    }
+
+
+def main():
+    print(f"{'transform':<12}{'N':>9}{'scalar [us]':>14}{'batched [us]':>14}{'speed-up':>10}")
+    for n in SIZES:
+        for name, (scalar, batched) in make_cases(n).items():
+            scalar_time = time_per_item(scalar, n) * 1e6
+            batched_time = time_per_item(batched, n) * 1e6
+            print(f"{name:<12}{n:>9}{scalar_time:14.3f}{batched_time:14.4f}"
+                  f"{scalar_time / batched_time:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
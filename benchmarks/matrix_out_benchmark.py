@@ -0,0 +1,64 @@
+# Compares the per-frame cost of preparing matrices for glUniformMatrix4fv
+# the old way (new float64 array, converted to float32 on upload) with
+# writing float32 matrices into preallocated buffers through out=.
+# Run from the repository root: python benchmarks/matrix_out_benchmark.py
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+package_dir = str(Path(__file__).resolve().parents[1])
+# Add the package directory into sys.path if necessary
+if package_dir not in sys.path:
+    sys.path.insert(0, package_dir)
+
+from core.matrix import Matrix
+
+FRAMES = 10_000
+
+
+def frame_allocating(t):
+    m_matrix = Matrix.make_translation(0, 0, -1) @ Matrix.make_rotation_y(t)
+    p_matrix = Matrix.make_perspective()
+    # PyOpenGL converts float64 input to a new float32 array before every upload
+    return (np.ascontiguousarray(m_matrix, dtype=np.float32),
+            np.ascontiguousarray(p_matrix, dtype=np.float32))
+
+
+translation = np.empty((4, 4), dtype=np.float32)
+rotation = np.empty((4, 4), dtype=np.float32)
+m_matrix = np.empty((4, 4), dtype=np.float32)
+p_matrix = Matrix.make_perspective(dtype=np.float32)
+
+
+def frame_preallocated(t):
+    Matrix.make_translation(0, 0, -1, out=translation)
+    Matrix.make_rotation_y(t, out=rotation)
+    np.matmul(translation, rotation, out=m_matrix)
+    # The projection only changes on resize, so it is reused as is
+    return m_matrix, p_matrix
+
+
+def measure(frame):
+    tracemalloc.start()
+    frame(0.5)
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    frame(0.5)
+    allocated = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    seconds = min(timeit.repeat(lambda: frame(0.5), number=FRAMES, repeat=5))
+    return seconds / FRAMES * 1e6, allocated
+
+
+def main():
+    print(f"{'mode':<14}{'per frame [us]':>16}{'peak bytes/frame':>18}")
+    for name, frame in [("allocating", frame_allocating), ("preallocated", frame_preallocated)]:
+        micros, allocated = measure(frame)
+        print(f"{name:<14}{micros:16.3f}{allocated:18d}")
+
+
+if __name__ == "__main__":
+    main()
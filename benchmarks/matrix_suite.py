@@ -0,0 +1,177 @@
+# Repeatable benchmark suite for core.matrix and core.matrix2.
+# Times every constructor (scalar and batched) across input sizes, checks that
+# both modules agree up to their transpose convention and writes the results as JSON.
+# Run from the repository root: python benchmarks/matrix_suite.py --output matrix_benchmark.json
+import argparse
+import json
+import platform
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+package_dir = str(Path(__file__).resolve().parents[1])
+# Add the package directory into sys.path if necessary
+if package_dir not in sys.path:
+    sys.path.insert(0, package_dir)
+
+from core.matrix import Matrix
+from core.matrix2 import Matrix as Matrix2
+
+SIZES = [1, 100, 10_000]
+TOLERANCE = 1e-5
+
+
+def make_inputs(n):
+    rng = np.random.default_rng(0)
+    return {
+        "positions": rng.random((n, 3)) * 10,
+        "angles": rng.random(n) * 2 * np.pi,
+        "scales": rng.random(n) + 0.5,
+        "fovs": rng.random(n) * 90 + 30,
+        "aspects": rng.random(n) + 0.5,
+        # Keep the eye away from the target so look-at stays well defined
+        "eyes": rng.random((n, 3)) * 10 + 5,
+        "targets": rng.random((n, 3)),
+    }
+
+
+def scalar_cases(inputs):
+    """ name -> (module, callable building one matrix per input) """
+    p, a, s = inputs["positions"], inputs["angles"], inputs["scales"]
+    fovs, aspects = inputs["fovs"], inputs["aspects"]
+    eyes, targets = inputs["eyes"], inputs["targets"]
+    return {
+        "make_identity": ("core.matrix", lambda: [Matrix.make_identity() for _ in a]),
+        "make_translation": ("core.matrix", lambda: [Matrix.make_translation(*v) for v in p]),
+        "make_rotation_x": ("core.matrix", lambda: [Matrix.make_rotation_x(v) for v in a]),
+        "make_rotation_y": ("core.matrix", lambda: [Matrix.make_rotation_y(v) for v in a]),
+        "make_rotation_z": ("core.matrix", lambda: [Matrix.make_rotation_z(v) for v in a]),
+        "make_scale": ("core.matrix", lambda: [Matrix.make_scale(v) for v in s]),
+        "make_perspective": ("core.matrix", lambda: [
+            Matrix.make_perspective(f, r) for f, r in zip(fovs, aspects)]),
+        "make_orthographic": ("core.matrix", lambda: [
+            Matrix.make_orthographic(-r, r, -1, 1, -1, 1) for r in aspects]),
+        "make_look_at": ("core.matrix", lambda: [
+            Matrix.make_look_at(e, t) for e, t in zip(eyes, targets)]),
+        "matrix2.make_identity": ("core.matrix2", lambda: [Matrix2.make_identity() for _ in a]),
+        "matrix2.perspective": ("core.matrix2", lambda: [
+            Matrix2.perspective(f, r, 0.1, 1000) for f, r in zip(fovs, aspects)]),
+        "matrix2.make_perspective": ("core.matrix2", lambda: [
+            Matrix2.make_perspective(f, r) for f, r in zip(fovs, aspects)]),
+        "matrix2.look_at": ("core.matrix2", lambda: [
+            Matrix2.look_at(e, t) for e, t in zip(eyes, targets)]),
+    }
+
+
+def batched_cases(inputs):
+    """ name -> (module, callable building all matrices at once) """
+    p, a, s = inputs["positions"], inputs["angles"], inputs["scales"]
+    return {
+        "make_identities": ("core.matrix", lambda: Matrix.make_identities(len(a))),
+        "make_translations": ("core.matrix", lambda: Matrix.make_translations(p)),
+        "make_rotations_x": ("core.matrix", lambda: Matrix.make_rotations_x(a)),
+        "make_rotations_y": ("core.matrix", lambda: Matrix.make_rotations_y(a)),
+        "make_rotations_z": ("core.matrix", lambda: Matrix.make_rotations_z(a)),
+        "make_scales": ("core.matrix", lambda: Matrix.make_scales(s)),
+    }
+
+
+def time_per_item(function, n):
+    """ Best of several runs, divided by the number of matrices built """
+    number = max(1, 1_000 // n)
+    best = min(timeit.repeat(function, number=number, repeat=5))
+    return best / number / n
+
+
+def max_error(a, b):
+    return float(np.max(np.abs(np.asarray(a, dtype=float) - np.asarray(b, dtype=float))))
+
+
+def check_agreement():
+    """ Compare the two modules (and batched with scalar methods) on a small set of inputs """
+    inputs = make_inputs(16)
+    checks = {
+        "make_identity == matrix2.make_identity": max_error(
+            Matrix.make_identity(), Matrix2.make_identity()),
+        # matrix2.perspective is stored transposed (row vectors)
+        "make_perspective == matrix2.perspective.T": max(
+            max_error(Matrix.make_perspective(f, r), Matrix2.perspective(f, r, 0.1, 1000).T)
+            for f, r in zip(inputs["fovs"], inputs["aspects"])),
+        "make_perspective == matrix2.make_perspective": max(
+            max_error(Matrix.make_perspective(f, r), Matrix2.make_perspective(f, r))
+            for f, r in zip(inputs["fovs"], inputs["aspects"])),
+        # make_look_at returns the camera transform, matrix2.look_at the transposed view matrix
+        "inverse_rigid(make_look_at) == matrix2.look_at.T": max(
+            max_error(Matrix.inverse_rigid(Matrix.make_look_at(e, t)), Matrix2.look_at(e, t).T)
+            for e, t in zip(inputs["eyes"], inputs["targets"])),
+        "make_translations == make_translation": max_error(
+            Matrix.make_translations(inputs["positions"]),
+            [Matrix.make_translation(*v) for v in inputs["positions"]]),
+        "make_rotations_x == make_rotation_x": max_error(
+            Matrix.make_rotations_x(inputs["angles"]),
+            [Matrix.make_rotation_x(v) for v in inputs["angles"]]),
+        "make_rotations_y == make_rotation_y": max_error(
+            Matrix.make_rotations_y(inputs["angles"]),
+            [Matrix.make_rotation_y(v) for v in inputs["angles"]]),
+        "make_rotations_z == make_rotation_z": max_error(
+            Matrix.make_rotations_z(inputs["angles"]),
+            [Matrix.make_rotation_z(v) for v in inputs["angles"]]),
+        "make_scales == make_scale": max_error(
+            Matrix.make_scales(inputs["scales"]),
+            [Matrix.make_scale(v) for v in inputs["scales"]]),
+    }
+    return [{"check": name, "max_abs_error": error, "ok": error <= TOLERANCE}
+            for name, error in checks.items()]
+
+
+def run_timings(sizes):
+    results = []
+    for n in sizes:
+        inputs = make_inputs(n)
+        for kind, cases in [("scalar", scalar_cases(inputs)), ("batched", batched_cases(inputs))]:
+            for name, (module, function) in cases.items():
+                results.append({
+                    "module": module,
+                    "function": name,
+                    "kind": kind,
+                    "n": n,
+                    "seconds_per_matrix": time_per_item(function, n),
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark core.matrix and core.matrix2")
+    parser.add_argument("--output", default="matrix_benchmark.json", help="path of the JSON report")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="numbers of matrices per run")
+    args = parser.parse_args()
+
+    agreement = check_agreement()
+    results = run_timings(args.sizes)
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "agreement": agreement,
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+
+    for entry in results:
+        print(f"{entry['kind']:<8}{entry['function']:<28}{entry['n']:>7}"
+              f"{entry['seconds_per_matrix'] * 1e6:12.3f} us")
+    for entry in agreement:
+        status = "ok" if entry["ok"] else "MISMATCH"
+        print(f"{status:<9}{entry['check']} (max error {entry['max_abs_error']:.2e})")
+    print(f"report written to {args.output}")
+    # Fail loudly if the two conventions drifted apart
+    return 0 if all(entry["ok"] for entry in agreement) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
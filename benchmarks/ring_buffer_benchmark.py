@@ -0,0 +1,98 @@
+# Per-frame vertex streaming: glBufferData every frame versus core.ring_buffer.RingBuffer,
+# both with persistent mapping and with the orphaning fallback.
+# Needs EGL (e.g. Mesa llvmpipe); run from the repository root:
+# python benchmarks/ring_buffer_benchmark.py
+import sys
+import time
+from ctypes import c_void_p as buffer_offset
+from pathlib import Path
+
+import gl_context
+import OpenGL.GL as GL
+import numpy as np
+
+package_dir = str(Path(__file__).resolve().parents[1])
+# Add the package directory into sys.path if necessary
+if package_dir not in sys.path:
+    sys.path.insert(0, package_dir)
+
+from core.gl_state import GLState
+from core.resources import ResourceRegistry
+from core.ring_buffer import RingBuffer
+from core.utils import Utils
+
+VERTEX_COUNT = 100_000
+FRAMES = 300
+
+vs_code = """
+    layout (location = 0) in vec3 vPosition;
+    void main()
+    {
+        gl_Position = vec4(vPosition, 1.0);
+    }
+"""
+fs_code = """
+    out vec4 fragColor;
+    void main()
+    {
+        fragColor = vec4(1.0);
+    }
+"""
+
+
+def animate(vertices, frame):
+    # Cheap per-frame change so every frame really uploads new data
+    vertices[:, 2] = frame * 1e-4
+    return vertices
+
+
+def run_buffer_data(vertices):
+    buffer_ref = ResourceRegistry.create_buffer()
+    GLState.bind_buffer(GL.GL_ARRAY_BUFFER, buffer_ref)
+    for frame in range(FRAMES):
+        data = animate(vertices, frame)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, data.nbytes, data, GL.GL_STREAM_DRAW)
+        GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, False, 0, buffer_offset(0))
+        GL.glDrawArrays(GL.GL_POINTS, 0, VERTEX_COUNT)
+    ResourceRegistry.delete_buffer(buffer_ref)
+
+
+def run_ring_buffer(vertices, persistent):
+    ring = RingBuffer(vertices.nbytes, persistent=persistent)
+    GLState.bind_buffer(GL.GL_ARRAY_BUFFER, ring.buffer_ref)
+    for frame in range(FRAMES):
+        view = ring.begin_frame(np.float32).reshape(-1, 3)
+        view[:] = animate(vertices, frame)
+        ring.flush(vertices.nbytes)
+        GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, False, 0, buffer_offset(ring.offset))
+        GL.glDrawArrays(GL.GL_POINTS, 0, VERTEX_COUNT)
+        ring.end_frame()
+    ring.delete()
+
+
+def main():
+    gl_context.create_context()
+    program_ref = Utils.initialize_program(vs_code, fs_code)
+    GLState.use_program(program_ref)
+    GLState.bind_vertex_array(GL.glGenVertexArrays(1))
+    GL.glEnableVertexAttribArray(0)
+    vertices = np.random.default_rng(0).random((VERTEX_COUNT, 3)).astype(np.float32)
+
+    cases = [("glBufferData per frame", lambda: run_buffer_data(vertices)),
+             ("ring buffer, orphaning", lambda: run_ring_buffer(vertices, persistent=False))]
+    if RingBuffer.is_persistent_mapping_supported():
+        cases.append(("ring buffer, persistent", lambda: run_ring_buffer(vertices, persistent=True)))
+    else:
+        print("glBufferStorage is not available; skipping the persistent ring buffer")
+
+    print(f"{VERTEX_COUNT} vertices ({vertices.nbytes / 1e6:.1f} MB) per frame, {FRAMES} frames")
+    for name, run in cases:
+        start = time.perf_counter()
+        run()
+        GL.glFinish()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<26}{elapsed / FRAMES * 1e3:8.3f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Stress test for core.scene_graph: a 10k-node tree in which 1% of the nodes
+# move every frame, compared with a static frame and a full recompute.
+# Run from the repository root: python benchmarks/scene_graph_benchmark.py
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+package_dir = str(Path(__file__).resolve().parents[1])
+# Add the package directory into sys.path if necessary
+if package_dir not in sys.path:
+    sys.path.insert(0, package_dir)
+
+from core.matrix import Matrix
+from core.scene_graph import SceneGraph
+
+NODE_COUNT = 10_000
+MOVING_FRACTION = 0.01
+FRAMES = 200
+
+
+def build_graph(rng):
+    graph = SceneGraph()
+    graph.add_node()
+    # Each node hangs below a random earlier node, which gives a bushy tree of moderate depth
+    parents = (rng.random(NODE_COUNT - 1) * np.arange(1, NODE_COUNT)).astype(np.int32)
+    offsets = rng.random((NODE_COUNT - 1, 3)).astype(np.float32)
+    for parent, offset in zip(parents, offsets):
+        graph.add_node(parent, Matrix.make_translation(*offset, dtype=np.float32))
+    graph.update()
+    return graph
+
+
+def main():
+    rng = np.random.default_rng(0)
+    graph = build_graph(rng)
+    moving_count = int(NODE_COUNT * MOVING_FRACTION)
+    angles = rng.random(moving_count).astype(np.float32)
+    frame_number = [0]
+
+    def moving_frame():
+        frame_number[0] += 1
+        indices = rng.choice(NODE_COUNT, moving_count, replace=False)
+        rotations = Matrix.make_rotations_y(angles + 0.01 * frame_number[0])
+        graph.set_local_matrices(indices, Matrix.compose(graph.local_matrices[indices], rotations))
+        return graph.update()
+
+    def static_frame():
+        return graph.update()
+
+    def full_recompute_frame():
+        graph.set_local_matrices(np.arange(NODE_COUNT), graph.local_matrices)
+        return graph.update()
+
+    print(f"{NODE_COUNT} nodes, {moving_count} moving per frame")
+    print(f"{'frame':<16}{'ms/frame':>10}{'world matrices recomputed':>28}")
+    for name, frame in [("static", static_frame),
+                        ("1% moving", moving_frame),
+                        ("full recompute", full_recompute_frame)]:
+        recomputed = frame()
+        seconds = min(timeit.repeat(frame, number=FRAMES, repeat=3)) / FRAMES
+        print(f"{name:<16}{seconds * 1e3:10.3f}{recomputed:>28}")
+
+
+if __name__ == "__main__":
+    main()
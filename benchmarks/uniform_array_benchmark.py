@@ -0,0 +1,97 @@
+# Drawing many small objects: one glUniformMatrix4fv + draw call per object versus a mat4[] Uniform
+# uploaded in chunks of the shader's array length, each chunk drawn with one instanced draw call.
+# Needs EGL (e.g. Mesa llvmpipe); run from the repository root:
+# python benchmarks/uniform_array_benchmark.py
+import sys
+import time
+from pathlib import Path
+
+import gl_context
+import OpenGL.GL as GL
+import numpy as np
+
+package_dir = str(Path(__file__).resolve().parents[1])
+# Add the package directory into sys.path if necessary
+if package_dir not in sys.path:
+    sys.path.insert(0, package_dir)
+
+from core.gl_state import GLState
+from core.matrix import Matrix
+from core.uniform import Uniform
+from core.utils import Utils
+
+OBJECT_COUNT = 4096
+FRAMES = 20
+
+vs_code = """
+    layout (location = 0) in vec3 vPosition;
+    // per-object matrices; instance i of a draw call uses element i
+    uniform mat4 modelMatrices[128];
+    uniform bool instanced;
+    uniform mat4 modelMatrix;
+    void main()
+    {
+        mat4 m = instanced ? modelMatrices[gl_InstanceID] : modelMatrix;
+        gl_Position = m * vec4(vPosition, 1.0);
+    }
+"""
+fs_code = """
+    out vec4 fragColor;
+    void main()
+    {
+        fragColor = vec4(1.0);
+    }
+"""
+
+
+def main():
+    gl_context.create_context()
+    program_ref = Utils.initialize_program(vs_code, fs_code)
+    GLState.use_program(program_ref)
+
+    # one small triangle per object, spread over the viewport
+    triangle = np.array([[-0.01, -0.01, 0], [0.01, -0.01, 0], [0, 0.01, 0]], dtype=np.float32)
+    GLState.bind_vertex_array(GL.glGenVertexArrays(1))
+    GLState.bind_buffer(GL.GL_ARRAY_BUFFER, GL.glGenBuffers(1))
+    GL.glBufferData(GL.GL_ARRAY_BUFFER, triangle.nbytes, triangle, GL.GL_STATIC_DRAW)
+    GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, False, 0, None)
+    GL.glEnableVertexAttribArray(0)
+    positions = np.random.default_rng(0).random((OBJECT_COUNT, 3)) * 1.8 - 0.9
+    positions[:, 2] = 0
+    model_matrices = Matrix.make_translations(positions)
+
+    instanced = Uniform("bool", False)
+    instanced.locate_variable(program_ref, "instanced")
+    model_matrix = Uniform("mat4", model_matrices[0])
+    model_matrix.locate_variable(program_ref, "modelMatrix")
+    batch = Uniform("mat4[]", model_matrices)
+    batch.locate_variable(program_ref, "modelMatrices")
+
+    def per_object():
+        instanced.data = False
+        instanced.upload_data()
+        for matrix in model_matrices:
+            model_matrix.data = matrix
+            model_matrix.upload_data()
+            GL.glDrawArrays(GL.GL_TRIANGLES, 0, 3)
+
+    def batched():
+        instanced.data = True
+        instanced.upload_data()
+        for first, count in batch.upload_chunks():
+            GL.glDrawArraysInstanced(GL.GL_TRIANGLES, 0, 3, count)
+
+    print(f"{OBJECT_COUNT} objects, mat4[] chunks of {batch.array_length}")
+    for name, draw in [("uniform + draw per object", per_object), ("mat4[] chunks, instanced", batched)]:
+        draw()
+        GL.glFinish()
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            draw()
+        GL.glFinish()
+        elapsed = time.perf_counter() - start
+        print(f"{name:<28}{elapsed / FRAMES * 1e3:8.2f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# Per-uniform cost of core.uniform.Uniform.upload_data: the former if/elif chain of type name
+# compares versus the uploader selected once in locate_variable, with values that change every
+# pass (every call reaches glUniform*) and with unchanged values (calls are skipped).
+# Each case is run twice: with the real glUniform* functions, and with them replaced by a no-op,
+# which leaves the Python cost of dispatch and shadow comparison without the driver call.
+# Needs EGL (e.g. Mesa llvmpipe); run from the repository root:
+# python benchmarks/uniform_upload_benchmark.py
+import sys
+import time
+from pathlib import Path
+
+import gl_context
+import OpenGL.GL as GL
+import numpy as np
+
+package_dir = str(Path(__file__).resolve().parents[1])
+# Add the package directory into sys.path if necessary
+if package_dir not in sys.path:
+    sys.path.insert(0, package_dir)
+
+from core.gl_state import GLState
+from core.uniform import Uniform
+from core.utils import Utils
+
+PASSES = 20
+# each case is timed REPEATS times and the fastest run is reported
+REPEATS = 5
+# array length per type; the variables are the array elements, e.g. "fValues[3]"
+COUNTS = {"int": 256, "float": 256, "vec3": 256, "vec4": 256, "mat4": 32}
+NAMES = {"int": "iValues", "float": "fValues", "vec3": "v3Values", "vec4": "v4Values", "mat4": "mValues"}
+
+vs_code = """
+    void main()
+    {
+        gl_Position = vec4(0.0);
+    }
+"""
+fs_code = """
+    uniform int iValues[256];
+    uniform float fValues[256];
+    uniform vec3 v3Values[256];
+    uniform vec4 v4Values[256];
+    uniform mat4 mValues[32];
+    out vec4 fragColor;
+    void main()
+    {
+        vec4 sum = vec4(0.0);
+        int i = int(gl_FragCoord.x);
+        sum += vec4(float(iValues[i % 256]) + fValues[i % 256]);
+        sum += vec4(v3Values[i % 256], 1.0) + v4Values[i % 256];
+        sum += mValues[i % 32] * sum;
+        fragColor = sum;
+    }
+"""
+
+
+def chain_upload(uniform):
+    """ The dispatch Uniform.upload_data used before uploaders were bound per uniform """
+    data_type, variable_ref, data = uniform._data_type, uniform._variable_ref, uniform.data
+    if variable_ref != -1:
+        if data_type == 'int':
+            GL.glUniform1i(variable_ref, data)
+        elif data_type == 'bool':
+            GL.glUniform1i(variable_ref, data)
+        elif data_type == 'float':
+            GL.glUniform1f(variable_ref, data)
+        elif data_type == 'vec2':
+            GL.glUniform2f(variable_ref, *data)
+        elif data_type == 'vec3':
+            GL.glUniform3f(variable_ref, *data)
+        elif data_type == 'vec4':
+            GL.glUniform4f(variable_ref, *data)
+        elif data_type == 'mat4':
+            GL.glUniformMatrix4fv(variable_ref, 1, GL.GL_TRUE, data)
+
+
+GL_FUNCTIONS = ["glUniform1i", "glUniform1f", "glUniform2f", "glUniform3f", "glUniform4f", "glUniformMatrix4fv"]
+# real glUniform* functions and Uniform.VALUE_TYPES entries, restored after stubbing
+ORIGINALS = {name: getattr(GL, name) for name in GL_FUNCTIONS}
+ORIGINAL_VALUE_TYPES = dict(Uniform.VALUE_TYPES)
+
+
+def no_op(*args):
+    pass
+
+
+def stub_gl(stubbed):
+    """ Replace the glUniform* functions used by both upload paths by no_op, or restore them """
+    for name in GL_FUNCTIONS:
+        setattr(GL, name, no_op if stubbed else ORIGINALS[name])
+    for data_type, (convert, upload_function) in ORIGINAL_VALUE_TYPES.items():
+        Uniform.VALUE_TYPES[data_type] = (convert, no_op if stubbed else upload_function)
+
+
+def make_values(data_type, variant):
+    if data_type == "int":
+        return [1 + variant, 2 + variant]
+    if data_type == "float":
+        return [0.5 + variant, 1.5 + variant]
+    if data_type == "mat4":
+        return [np.eye(4, dtype=np.float32) * (1 + variant), np.eye(4, dtype=np.float32) * (2 + variant)]
+    count = 3 if data_type == "vec3" else 4
+    return [[0.25 + variant] * count, [0.75 + variant] * count]
+
+
+def main():
+    gl_context.create_context()
+    program_ref = Utils.initialize_program(vs_code, fs_code)
+    GLState.use_program(program_ref)
+
+    def locate_uniforms():
+        uniforms = []
+        for data_type, count in COUNTS.items():
+            values = make_values(data_type, 0)
+            for i in range(count):
+                uniform = Uniform(data_type, values[0])
+                uniform.locate_variable(program_ref, f"{NAMES[data_type]}[{i}]")
+                uniforms.append((uniform, make_values(data_type, 0)))
+        return uniforms
+
+    def run(uniforms, upload, changing):
+        best = float("inf")
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            for pass_index in range(PASSES):
+                for uniform, values in uniforms:
+                    if changing:
+                        uniform.data = values[pass_index % 2]
+                    upload(uniform)
+            GL.glFinish()
+            best = min(best, time.perf_counter() - start)
+        return best / (PASSES * len(uniforms)) * 1e6
+
+    for stubbed in (False, True):
+        # the bound uploaders capture their glUniform* function, so locate after stubbing
+        stub_gl(stubbed)
+        uniforms = locate_uniforms()
+        Uniform.forget_program(program_ref)
+        results = [("if/elif chain, changing values", run(uniforms, chain_upload, changing=True)),
+                   ("bound uploader, changing values", run(uniforms, Uniform.upload_data, changing=True))]
+        Uniform.reset_upload_counters()
+        results.append(("bound uploader, unchanged values", run(uniforms, Uniform.upload_data, changing=False)))
+        print(f"{len(uniforms)} uniforms, {PASSES} passes, "
+              f"{'glUniform* stubbed out (Python cost only)' if stubbed else 'real glUniform* calls'}")
+        for name, microseconds in results:
+            print(f"  {name:<34}{microseconds:8.3f} us/uniform")
+        counters = Uniform.upload_counters
+        print(f"  unchanged values: {counters['uploads']} uploads, {counters['skipped']} skipped")
+    stub_gl(False)
+
+
+if __name__ == "__main__":
+    main()
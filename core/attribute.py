@@ -1,15 +1,72 @@
 import OpenGL.GL as GL
 import numpy as np
 
+from core.gl_state import GLState
+from core.program import Program
+from core.resources import ResourceRegistry
+
 
 class Attribute:
-    def __init__(self, data_type, data):
-        # type of elements in data array: int | float | vec2 | vec3 | vec4
+    # Upload statistics shared by all attributes: bytes that had to be converted or copied
+    # before glBufferData, and bytes handed to glBufferData directly from the caller's memory.
+    # Kept in a dict, like Uniform.upload_counters, so uploads do not assign class attributes.
+    upload_counters = {"bytes_copied": 0, "bytes_passed_through": 0}
+
+    # Buffer usage hint for each update mode:
+    # static: uploaded once; dynamic: edited in place (partial updates with glBufferSubData);
+    # stream: rewritten every frame (the old storage is orphaned so the driver need not wait for it)
+    USAGE_HINTS = {
+        "static": GL.GL_STATIC_DRAW,
+        "dynamic": GL.GL_DYNAMIC_DRAW,
+        "stream": GL.GL_STREAM_DRAW,
+    }
+
+    # Number of components per vertex for each data type
+    COMPONENT_COUNTS = {
+        "int": 1, "ivec2": 2, "ivec3": 3, "ivec4": 4,
+        "float": 1, "vec2": 2, "vec3": 3, "vec4": 4,
+    }
+
+    # Storage format of the components in the GPU buffer:
+    # format -> (numpy type, GL type, normalized)
+    # Normalized formats map the integer range to [0, 1] (unsigned) or [-1, 1] (signed) in the shader.
+    FORMATS = {
+        "float32": (np.float32, GL.GL_FLOAT, False),
+        "float16": (np.float16, GL.GL_HALF_FLOAT, False),
+        "unorm8": (np.uint8, GL.GL_UNSIGNED_BYTE, True),
+        "snorm8": (np.int8, GL.GL_BYTE, True),
+        # x, y, z with 10 bits and w with 2 bits packed into one 32-bit word per vertex
+        "int_2_10_10_10_rev": (np.uint32, GL.GL_INT_2_10_10_10_REV, True),
+        # true integers, read by glVertexAttribIPointer
+        "int32": (np.int32, GL.GL_INT, False),
+    }
+
+    def __init__(self, data_type, data, usage="static", component_format=None, raw_bytes=False):
+        # type of elements in data array: int | ivec2 | ivec3 | ivec4 | float | vec2 | vec3 | vec4
         self._data_type = data_type
         # array of data to be stored in buffer
         self._data = data
+        # update mode: static | dynamic | stream
+        if usage not in Attribute.USAGE_HINTS:
+            raise Exception(f'Attribute has unknown usage {usage}')
+        self._usage = usage
+        # format of the data in the GPU buffer; float data is converted to it on upload
+        if component_format is None:
+            component_format = "int32" if data_type.startswith(("int", "ivec")) else "float32"
+        if component_format not in Attribute.FORMATS:
+            raise Exception(f'Attribute has unknown format {component_format}')
+        if (component_format == "int32") != data_type.startswith(("int", "ivec")):
+            raise Exception(f'Format {component_format} does not match attribute type {data_type}')
+        self._component_format = component_format
+        # data is a bytes-like object (e.g. read from a file) holding values already in the storage
+        # format; otherwise byte buffers are uint8 values, converted like any other data
+        self._raw_bytes = raw_bytes
+        # size of the storage allocated on the GPU, in bytes; None until the first upload
+        self._buffer_size = None
+        # vertex range [first, stop) changed since the last upload; None means everything
+        self._dirty_range = None
         # reference of available buffer from GPU
-        self._buffer_ref = GL.glGenBuffers(1)
+        self._buffer_ref = ResourceRegistry.create_buffer()
         # Upload data immediately
         self.upload_data()
 
@@ -20,42 +77,151 @@ class Attribute:
     @data.setter
     def data(self, data):
         self._data = data
+        self._dirty_range = None
+
+    @property
+    def usage(self):
+        return self._usage
+
+    @property
+    def component_format(self):
+        return self._component_format
+
+    def mark_dirty(self, first_vertex, stop_vertex):
+        """
+        Record that vertices [first_vertex, stop_vertex) of data were edited in place,
+        so the next upload_data() only sends that range
+        """
+        if self._dirty_range is not None:
+            first_vertex = min(first_vertex, self._dirty_range[0])
+            stop_vertex = max(stop_vertex, self._dirty_range[1])
+        self._dirty_range = (first_vertex, stop_vertex)
+
+    @staticmethod
+    def get_location(program_ref, variable_name):
+        """ Location of an attribute; a dictionary hit for a Program, a driver query for a plain reference """
+        if isinstance(program_ref, Program):
+            return program_ref.get_attribute_location(variable_name)
+        return GL.glGetAttribLocation(program_ref, variable_name)
+
+    @staticmethod
+    def reset_upload_counters():
+        Attribute.upload_counters["bytes_copied"] = 0
+        Attribute.upload_counters["bytes_passed_through"] = 0
+
+    @staticmethod
+    def _as_source_array(data, dtype, raw_bytes=False):
+        """ View data as a numpy array without copying it where possible """
+        if raw_bytes:
+            # Bytes already in the storage format: reinterpret them, they must hold whole values
+            nbytes = memoryview(data).nbytes
+            if nbytes % np.dtype(dtype).itemsize != 0:
+                raise Exception(f'{nbytes} raw bytes are not a whole number of {np.dtype(dtype).name} values')
+            return np.frombuffer(data, dtype=dtype)
+        # np.asarray does not copy arrays (including np.memmap) or typed memoryviews
+        return np.asarray(data)
+
+    @staticmethod
+    def _convert_data(data, component_format, component_count=4, raw_bytes=False):
+        """
+        Return data as a C-contiguous array in the given storage format and whether a copy was needed.
+        Arrays (including memory-mapped arrays) and memoryviews that already have the storage type
+        are returned as views of the caller's memory; float input is converted to compact formats.
+        With raw_bytes, data is any bytes-like object holding values in the storage format.
+        """
+        dtype = Attribute.FORMATS[component_format][0]
+        source = Attribute._as_source_array(data, dtype, raw_bytes)
+        if source.dtype == dtype:
+            array = np.ascontiguousarray(source)
+        elif component_format == "unorm8":
+            array = np.round(np.clip(source, 0, 1) * 255).astype(np.uint8)
+        elif component_format == "snorm8":
+            array = np.round(np.clip(source, -1, 1) * 127).astype(np.int8)
+        elif component_format == "int_2_10_10_10_rev":
+            array = Attribute._pack_2_10_10_10(source, component_count)
+        else:
+            array = np.ascontiguousarray(source, dtype=dtype)
+        copied = not (isinstance(data, (np.ndarray, memoryview)) or raw_bytes) or not np.may_share_memory(array, source)
+        return array, copied
+
+    @staticmethod
+    def _pack_2_10_10_10(source, component_count):
+        """ Pack signed normalized vec3 or vec4 values into one uint32 per vertex; w defaults to 0 """
+        values = np.asarray(source, dtype=np.float32).reshape(-1, component_count)
+        xyz = np.round(np.clip(values[:, :3], -1, 1) * 511).astype(np.int32) & 0x3FF
+        packed = (xyz[:, 0] | (xyz[:, 1] << 10) | (xyz[:, 2] << 20)).astype(np.uint32)
+        if values.shape[1] > 3:
+            w = np.round(np.clip(values[:, 3], -1, 1)).astype(np.int32) & 0x3
+            packed |= (w << 30).astype(np.uint32)
+        return packed
+
+    def _elements_per_vertex(self):
+        if self._component_format == "int_2_10_10_10_rev":
+            return 1
+        return Attribute.COMPONENT_COUNTS.get(self._data_type, 1)
 
     def upload_data(self):
         """ Upload the data to a GPU buffer """
-        # Convert data to numpy array format; convert numbers to 32-bit floats
-        data = np.array(self._data).astype(np.float32)
+        # Convert data to a contiguous array in the storage format; no copy if it already is one
+        data, copied = Attribute._convert_data(
+            self._data, self._component_format, Attribute.COMPONENT_COUNTS.get(self._data_type, 4), self._raw_bytes)
+        usage_hint = Attribute.USAGE_HINTS[self._usage]
         # Select buffer used by the following functions
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self._buffer_ref)
-        # Store data in currently bound buffer
-        size_in_bytes = int(data.size * 32/8)
-        # print(size_in_bytes)
-        # print(type(data.ravel()))
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, data.nbytes, data.ravel(), GL.GL_STATIC_DRAW)
-
-    def associate_variable(self, program_ref, variable_name):
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, self._buffer_ref)
+        if self._buffer_size != data.nbytes or self._usage == "static":
+            # (Re)allocate storage and store data in currently bound buffer
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, data.nbytes, data, usage_hint)
+            self._buffer_size = data.nbytes
+            ResourceRegistry.set_size("buffer", self._buffer_ref, data.nbytes)
+            uploaded = data
+        elif self._usage == "stream":
+            # Orphan the old storage (the GPU may still read it) and fill a fresh one
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, data.nbytes, None, usage_hint)
+            GL.glBufferSubData(GL.GL_ARRAY_BUFFER, 0, data.nbytes, data)
+            uploaded = data
+        else:
+            # Only send the edited vertices
+            vertices = data.reshape(-1, self._elements_per_vertex())
+            first, stop = self._dirty_range if self._dirty_range is not None else (0, len(vertices))
+            uploaded = vertices[first:stop]
+            if uploaded.nbytes > 0:
+                offset = first * vertices[0:1].nbytes
+                GL.glBufferSubData(GL.GL_ARRAY_BUFFER, offset, uploaded.nbytes, uploaded)
+        if copied:
+            Attribute.upload_counters["bytes_copied"] += uploaded.nbytes
+        else:
+            Attribute.upload_counters["bytes_passed_through"] += uploaded.nbytes
+        ResourceRegistry.record_upload(uploaded.nbytes)
+        self._dirty_range = None
+
+    def associate_variable(self, program_ref, variable_name, variable_ref=None):
         """ Associate variable in program with the buffer """
-        # Get reference for program variable with given name
-        variable_ref = GL.glGetAttribLocation(program_ref, variable_name)
+        # Get reference for program variable with given name, unless the caller already knows it
+        if variable_ref is None:
+            variable_ref = Attribute.get_location(program_ref, variable_name)
         
         # variable_ref is an integer
         # print("var_ref: ", variable_ref)
         # If the program does not reference the variable, then exit
         if variable_ref != -1:
             # Select buffer used by the following functions
-            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self._buffer_ref)
+            GLState.bind_buffer(GL.GL_ARRAY_BUFFER, self._buffer_ref)
+            if self._data_type not in Attribute.COMPONENT_COUNTS:
+                raise Exception(f'Attribute {variable_name} has unknown type {self._data_type}')
+            component_count = Attribute.COMPONENT_COUNTS[self._data_type]
+            _, gl_type, normalized = Attribute.FORMATS[self._component_format]
             # Specify how data will be read from the currently bound buffer into the specified variable
-            if self._data_type == "int":
-                GL.glVertexAttribPointer(variable_ref, 1, GL.GL_INT, False, 0, None)
-            elif self._data_type == "float":
-                GL.glVertexAttribPointer(variable_ref, 1, GL.GL_FLOAT, False, 0, None)
-            elif self._data_type == "vec2":
-                GL.glVertexAttribPointer(variable_ref, 2, GL.GL_FLOAT, False, 0, None)
-            elif self._data_type == "vec3":
-                GL.glVertexAttribPointer(variable_ref, 3, GL.GL_FLOAT, False, 0, None)
-            elif self._data_type == "vec4":
-                GL.glVertexAttribPointer(variable_ref, 4, GL.GL_FLOAT, False, 0, None)
+            if self._component_format == "int32":
+                # Integer variables need the I variant; glVertexAttribPointer would convert to float
+                GL.glVertexAttribIPointer(variable_ref, component_count, gl_type, 0, None)
+            elif self._component_format == "int_2_10_10_10_rev":
+                # Packed formats always provide 4 components; the shader ignores the ones it does not declare
+                GL.glVertexAttribPointer(variable_ref, 4, gl_type, normalized, 0, None)
             else:
-                raise Exception(f'Attribute {variable_name} has unknown type {self._data_type}')
+                GL.glVertexAttribPointer(variable_ref, component_count, gl_type, normalized, 0, None)
             # Indicate that data will be streamed to this variable
             GL.glEnableVertexAttribArray(variable_ref)
+
+    def delete(self):
+        """ Free the GPU buffer """
+        ResourceRegistry.delete_buffer(self._buffer_ref)
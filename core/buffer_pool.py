@@ -0,0 +1,180 @@
+from collections import namedtuple
+from ctypes import c_void_p as buffer_offset
+
+import OpenGL.GL as GL
+import numpy as np
+
+from core.gl_state import GLState
+from core.resources import ResourceRegistry
+from core.vertex_array import VertexArray
+
+# Location of one mesh inside a BufferPool, in vertices and indices (not bytes)
+MeshAllocation = namedtuple('MeshAllocation', ['vertex_offset', 'vertex_count', 'index_offset', 'index_count'])
+
+
+class FreeListAllocator:
+    """
+    First-fit allocator over a range of [0, size) units. Free blocks are kept sorted by offset
+    and neighbouring blocks are merged when memory is released, so the range does not fragment
+    into unusable slivers.
+    """
+    def __init__(self, size):
+        self._size = size
+        # sorted list of [offset, size] of free blocks
+        self._free_blocks = [[0, size]] if size > 0 else []
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def free_blocks(self):
+        return [tuple(block) for block in self._free_blocks]
+
+    @property
+    def free_size(self):
+        return sum(size for _, size in self._free_blocks)
+
+    def allocate(self, size):
+        """ Return the offset of a block of the given size, or None if no free block is large enough """
+        for i, (offset, block_size) in enumerate(self._free_blocks):
+            if block_size >= size:
+                if block_size == size:
+                    del self._free_blocks[i]
+                else:
+                    self._free_blocks[i] = [offset + size, block_size - size]
+                return offset
+        return None
+
+    def free(self, offset, size):
+        """ Release a block and merge it with adjacent free blocks """
+        if size == 0:
+            return
+        i = 0
+        while i < len(self._free_blocks) and self._free_blocks[i][0] < offset:
+            i += 1
+        self._free_blocks.insert(i, [offset, size])
+        # merge with the following block
+        if i + 1 < len(self._free_blocks) and offset + size == self._free_blocks[i + 1][0]:
+            self._free_blocks[i][1] += self._free_blocks[i + 1][1]
+            del self._free_blocks[i + 1]
+        # merge with the preceding block
+        if i > 0 and self._free_blocks[i - 1][0] + self._free_blocks[i - 1][1] == offset:
+            self._free_blocks[i - 1][1] += self._free_blocks[i][1]
+            del self._free_blocks[i]
+
+    def grow(self, size):
+        """ Extend the managed range to size units; the new space becomes free """
+        old_size = self._size
+        self._size = size
+        self.free(old_size, size - old_size)
+
+
+class BufferPool:
+    """
+    Sub-allocates many small meshes out of one large interleaved vertex buffer and one uint32
+    index buffer, instead of creating buffer objects per mesh. All meshes share one VertexArray,
+    so drawing any of them is one glDrawElementsBaseVertex call after a single bind.
+    Buffers grow (reallocate and copy on the GPU) when they run out of space.
+    """
+    def __init__(self, program_ref, vertex_layout, vertex_capacity=65536, index_capacity=65536 * 3):
+        self._program_ref = program_ref
+        self._vertex_layout = vertex_layout
+        self._vertex_allocator = FreeListAllocator(vertex_capacity)
+        self._index_allocator = FreeListAllocator(index_capacity)
+        self._vertex_buffer_ref = BufferPool._create_buffer(vertex_capacity * vertex_layout.stride)
+        self._index_buffer_ref = BufferPool._create_buffer(index_capacity * 4)
+        self._vertex_array = None
+        self._record_bindings()
+
+    @property
+    def vertex_array(self):
+        return self._vertex_array
+
+    @property
+    def vertex_capacity(self):
+        return self._vertex_allocator.size
+
+    @property
+    def index_capacity(self):
+        return self._index_allocator.size
+
+    @staticmethod
+    def _create_buffer(size_in_bytes):
+        buffer_ref = ResourceRegistry.create_buffer()
+        GLState.bind_buffer(GL.GL_COPY_WRITE_BUFFER, buffer_ref)
+        GL.glBufferData(GL.GL_COPY_WRITE_BUFFER, size_in_bytes, None, GL.GL_STATIC_DRAW)
+        ResourceRegistry.set_size("buffer", buffer_ref, size_in_bytes)
+        return buffer_ref
+
+    @staticmethod
+    def _grow_buffer(buffer_ref, old_size_in_bytes, new_size_in_bytes):
+        """ Copy a buffer into a larger new one on the GPU and delete the old one """
+        new_buffer_ref = BufferPool._create_buffer(new_size_in_bytes)
+        GLState.bind_buffer(GL.GL_COPY_READ_BUFFER, buffer_ref)
+        GL.glCopyBufferSubData(GL.GL_COPY_READ_BUFFER, GL.GL_COPY_WRITE_BUFFER, 0, 0, old_size_in_bytes)
+        ResourceRegistry.delete_buffer(buffer_ref)
+        return new_buffer_ref
+
+    def _record_bindings(self):
+        if self._vertex_array is not None:
+            self._vertex_array.delete()
+        self._vertex_array = VertexArray(self._program_ref)
+        self._vertex_array.add_vertex_layout(self._vertex_layout, self._vertex_buffer_ref)
+        self._vertex_array.set_index_buffer(self._index_buffer_ref)
+        GLState.bind_vertex_array(0)
+
+    def _reserve(self, allocator, count, grow):
+        offset = allocator.allocate(count)
+        if offset is None:
+            new_size = max(2 * allocator.size, allocator.size + count)
+            grow(new_size)
+            offset = allocator.allocate(count)
+        return offset
+
+    def _grow_vertices(self, vertex_capacity):
+        stride = self._vertex_layout.stride
+        self._vertex_buffer_ref = BufferPool._grow_buffer(
+            self._vertex_buffer_ref, self._vertex_allocator.size * stride, vertex_capacity * stride)
+        self._vertex_allocator.grow(vertex_capacity)
+        self._record_bindings()
+
+    def _grow_indices(self, index_capacity):
+        self._index_buffer_ref = BufferPool._grow_buffer(
+            self._index_buffer_ref, self._index_allocator.size * 4, index_capacity * 4)
+        self._index_allocator.grow(index_capacity)
+        self._record_bindings()
+
+    def allocate(self, vertices, indices):
+        """
+        Store a mesh: vertices packed with the pool's VertexLayout, indices relative to the mesh's
+        first vertex. Returns a MeshAllocation to draw or free the mesh with.
+        """
+        vertices = np.ascontiguousarray(vertices, dtype=self._vertex_layout.dtype)
+        indices = np.ascontiguousarray(indices, dtype=np.uint32)
+        vertex_offset = self._reserve(self._vertex_allocator, len(vertices), self._grow_vertices)
+        index_offset = self._reserve(self._index_allocator, len(indices), self._grow_indices)
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, self._vertex_buffer_ref)
+        GL.glBufferSubData(GL.GL_ARRAY_BUFFER, vertex_offset * self._vertex_layout.stride, vertices.nbytes, vertices)
+        # Use the copy target so the upload does not change the element binding of a bound VAO
+        GLState.bind_buffer(GL.GL_COPY_WRITE_BUFFER, self._index_buffer_ref)
+        GL.glBufferSubData(GL.GL_COPY_WRITE_BUFFER, index_offset * 4, indices.nbytes, indices)
+        ResourceRegistry.record_upload(vertices.nbytes + indices.nbytes)
+        return MeshAllocation(vertex_offset, len(vertices), index_offset, len(indices))
+
+    def free(self, allocation):
+        self._vertex_allocator.free(allocation.vertex_offset, allocation.vertex_count)
+        self._index_allocator.free(allocation.index_offset, allocation.index_count)
+
+    def bind(self):
+        self._vertex_array.bind()
+
+    def draw(self, allocation, mode=GL.GL_TRIANGLES):
+        """ Draw one mesh; the pool must be bound """
+        GL.glDrawElementsBaseVertex(mode, allocation.index_count, GL.GL_UNSIGNED_INT,
+                                    buffer_offset(allocation.index_offset * 4), allocation.vertex_offset)
+
+    def delete(self):
+        self._vertex_array.delete()
+        ResourceRegistry.delete_buffer(self._vertex_buffer_ref)
+        ResourceRegistry.delete_buffer(self._index_buffer_ref)
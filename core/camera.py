@@ -0,0 +1,145 @@
+import numpy as np
+
+from core.matrix import Matrix
+
+
+class Camera:
+    """
+    Camera that caches its view, projection and view-projection matrices (float32, ready for
+    glUniformMatrix4fv). Setting an input only flags the matrix that depends on it; the matrix is
+    rebuilt, in place, the next time it is read. A camera that does not move costs nothing per frame.
+    """
+    def __init__(self, angle_of_view=60, aspect_ratio=1, near=0.1, far=1000,
+                 position=(0, 0, 0), target=(0, 0, -1)):
+        # projection parameters; "perspective" or "orthographic"
+        self._projection_type = "perspective"
+        self._angle_of_view = angle_of_view
+        self._aspect_ratio = aspect_ratio
+        self._near = near
+        self._far = far
+        # left, right, bottom, top of the orthographic box
+        self._orthographic_box = (-1, 1, -1, 1)
+        # eye position and point looked at, in world coordinates
+        self._position = np.array(position, dtype=float)
+        self._target = np.array(target, dtype=float)
+        # cached matrices, written in place when rebuilt
+        self._world_matrix = np.empty((4, 4), dtype=np.float32)
+        self._view_matrix = np.empty((4, 4), dtype=np.float32)
+        self._projection_matrix = np.empty((4, 4), dtype=np.float32)
+        self._view_projection_matrix = np.empty((4, 4), dtype=np.float32)
+        self._view_dirty = True
+        self._projection_dirty = True
+        self._view_projection_dirty = True
+        # incremented whenever the view-projection matrix changes
+        self._version = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    @property
+    def aspect_ratio(self):
+        return self._aspect_ratio
+
+    @aspect_ratio.setter
+    def aspect_ratio(self, aspect_ratio):
+        if aspect_ratio != self._aspect_ratio:
+            self._aspect_ratio = aspect_ratio
+            self._invalidate_projection()
+
+    @property
+    def angle_of_view(self):
+        return self._angle_of_view
+
+    @angle_of_view.setter
+    def angle_of_view(self, angle_of_view):
+        if angle_of_view != self._angle_of_view:
+            self._angle_of_view = angle_of_view
+            self._invalidate_projection()
+
+    @property
+    def position(self):
+        return self._position.copy()
+
+    @position.setter
+    def position(self, position):
+        if not np.array_equal(position, self._position):
+            self._position[:] = position
+            self._invalidate_view()
+
+    @property
+    def target(self):
+        return self._target.copy()
+
+    @target.setter
+    def target(self, target):
+        if not np.array_equal(target, self._target):
+            self._target[:] = target
+            self._invalidate_view()
+
+    def set_perspective(self, angle_of_view=60, aspect_ratio=1, near=0.1, far=1000):
+        self._projection_type = "perspective"
+        self._angle_of_view = angle_of_view
+        self._aspect_ratio = aspect_ratio
+        self._near = near
+        self._far = far
+        self._invalidate_projection()
+
+    def set_orthographic(self, left=-1, right=1, bottom=-1, top=1, near=-1, far=1):
+        self._projection_type = "orthographic"
+        self._orthographic_box = (left, right, bottom, top)
+        self._near = near
+        self._far = far
+        self._invalidate_projection()
+
+    def look_at(self, position, target):
+        self.position = position
+        self.target = target
+
+    @property
+    def world_matrix(self):
+        """ Transform of the camera itself (camera to world) """
+        self._update_view()
+        return self._world_matrix
+
+    @property
+    def view_matrix(self):
+        """ World to camera transform: the inverse of world_matrix """
+        self._update_view()
+        return self._view_matrix
+
+    @property
+    def projection_matrix(self):
+        if self._projection_dirty:
+            if self._projection_type == "perspective":
+                Matrix.make_perspective(self._angle_of_view, self._aspect_ratio, self._near, self._far,
+                                        out=self._projection_matrix)
+            else:
+                left, right, bottom, top = self._orthographic_box
+                Matrix.make_orthographic(left, right, bottom, top, self._near, self._far,
+                                         out=self._projection_matrix)
+            self._projection_dirty = False
+        return self._projection_matrix
+
+    @property
+    def view_projection_matrix(self):
+        if self._view_projection_dirty:
+            np.matmul(self.projection_matrix, self.view_matrix, out=self._view_projection_matrix)
+            self._view_projection_dirty = False
+        return self._view_projection_matrix
+
+    def _update_view(self):
+        if self._view_dirty:
+            Matrix.make_look_at(self._position, self._target, out=self._world_matrix)
+            self._view_matrix[:] = Matrix.inverse_rigid(self._world_matrix)
+            self._view_dirty = False
+
+    def _invalidate_view(self):
+        self._view_dirty = True
+        self._view_projection_dirty = True
+        self._version += 1
+
+    def _invalidate_projection(self):
+        self._projection_dirty = True
+        self._view_projection_dirty = True
+        self._version += 1
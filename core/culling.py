@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class Frustum:
+    """
+    View frustum as six planes (left, right, bottom, top, near, far) extracted from a
+    projection * view matrix. Each plane is a row (a, b, c, d) with a unit normal pointing
+    into the frustum, so a point p is inside when a*x + b*y + c*z + d >= 0 for all six planes.
+    The tests take all objects at once and return a boolean visibility mask.
+    """
+    def __init__(self, view_projection_matrix):
+        self._planes = Frustum.extract_planes(view_projection_matrix)
+
+    @staticmethod
+    def from_matrices(projection_matrix, view_matrix):
+        """ view_matrix transforms world into camera coordinates (the inverse of the camera transform) """
+        return Frustum(np.asarray(projection_matrix) @ np.asarray(view_matrix))
+
+    @property
+    def planes(self):
+        return self._planes
+
+    @staticmethod
+    def extract_planes(matrix):
+        """ Gribb/Hartmann plane extraction for the row-major, column-vector matrices of core.matrix """
+        m = np.asarray(matrix, dtype=np.float32)
+        planes = np.array([
+            m[3] + m[0],    # left
+            m[3] - m[0],    # right
+            m[3] + m[1],    # bottom
+            m[3] - m[1],    # top
+            m[3] + m[2],    # near
+            m[3] - m[2],    # far
+        ])
+        return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+    def test_spheres(self, centers, radii):
+        """ Visibility mask for bounding spheres with centers (N, 3) and radii (N,) """
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+        radii = np.asarray(radii, dtype=np.float32).reshape(-1, 1)
+        distances = centers @ self._planes[:, :3].T + self._planes[:, 3]
+        return np.all(distances >= -radii, axis=1)
+
+    def test_aabbs(self, bounds):
+        """
+        Visibility mask for axis-aligned bounding boxes given as (N, 2, 3) arrays of
+        (min corner, max corner). A box is culled only if it lies completely outside one plane;
+        boxes near frustum corners may be reported visible, which is safe for drawing.
+        """
+        bounds = np.asarray(bounds, dtype=np.float32).reshape(-1, 2, 3)
+        centers = (bounds[:, 0] + bounds[:, 1]) / 2
+        extents = (bounds[:, 1] - bounds[:, 0]) / 2
+        normals = self._planes[:, :3]
+        distances = centers @ normals.T + self._planes[:, 3]
+        # Projected half size of each box onto each plane normal
+        radii = extents @ np.abs(normals).T
+        return np.all(distances + radii >= 0, axis=1)
+
+    @staticmethod
+    def transform_aabbs(bounds, matrices):
+        """
+        World-space boxes enclosing local boxes (N, 2, 3) transformed by model matrices (N, 4, 4),
+        for example the world matrices of core.scene_graph.SceneGraph
+        """
+        bounds = np.asarray(bounds, dtype=np.float32).reshape(-1, 2, 3)
+        matrices = np.asarray(matrices, dtype=np.float32).reshape(-1, 4, 4)
+        centers = (bounds[:, 0] + bounds[:, 1]) / 2
+        extents = (bounds[:, 1] - bounds[:, 0]) / 2
+        linear = matrices[:, :3, :3]
+        world_centers = np.einsum('nij,nj->ni', linear, centers) + matrices[:, :3, 3]
+        world_extents = np.einsum('nij,nj->ni', np.abs(linear), extents)
+        return np.stack([world_centers - world_extents, world_centers + world_extents], axis=1)
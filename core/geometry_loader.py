@@ -0,0 +1,268 @@
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from ctypes import c_void_p as buffer_offset
+
+import OpenGL.GL as GL
+import numpy as np
+
+from core.gl_state import GLState
+from core.resources import ResourceRegistry
+from core.vertex_array import VertexArray
+
+
+class LoadedMesh:
+    """
+    Handle of a mesh requested from a GeometryLoader. It can be drawn as soon as all of its data is
+    resident on the GPU; until then draw() does nothing and progress reports the fraction uploaded.
+    """
+    def __init__(self, vertex_layout, program_ref, loader=None):
+        self._vertex_layout = vertex_layout
+        self._program_ref = program_ref
+        # GeometryLoader that builds and uploads the mesh, and the future of its build
+        self._loader = loader
+        self._future = None
+        # building -> uploading -> resident, or failed; deleted from any state
+        self._state = "building"
+        self._error = None
+        self._vertex_count = 0
+        self._index_count = 0
+        # [buffer reference, data as bytes, bytes already uploaded] for the vertex and index buffer
+        self._uploads = []
+        self._bytes_total = 0
+        self._bytes_uploaded = 0
+        self._vertex_buffer_ref = None
+        self._index_buffer_ref = None
+        self._vertex_array = None
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def error(self):
+        """ Exception raised by the build function, if the mesh failed """
+        return self._error
+
+    @property
+    def is_resident(self):
+        return self._state == "resident"
+
+    @property
+    def progress(self):
+        """ Fraction of the mesh data uploaded so far, from 0 to 1 """
+        if self._state == "resident":
+            return 1.0
+        if self._bytes_total == 0:
+            return 0.0
+        return self._bytes_uploaded / self._bytes_total
+
+    @property
+    def vertex_count(self):
+        return self._vertex_count
+
+    @property
+    def index_count(self):
+        return self._index_count
+
+    @property
+    def vertex_array(self):
+        return self._vertex_array
+
+    def _start_upload(self, vertices, indices):
+        """ Allocate GPU storage for the built data; runs on the GL thread """
+        self._vertex_count = len(vertices)
+        self._vertex_buffer_ref = LoadedMesh._create_buffer(vertices.nbytes)
+        self._uploads.append([self._vertex_buffer_ref, vertices.view(np.uint8).reshape(-1), 0])
+        if indices is not None:
+            self._index_count = len(indices)
+            self._index_buffer_ref = LoadedMesh._create_buffer(indices.nbytes)
+            self._uploads.append([self._index_buffer_ref, indices.view(np.uint8).reshape(-1), 0])
+        self._bytes_total = sum(len(data) for _, data, _ in self._uploads)
+        self._state = "uploading"
+
+    @staticmethod
+    def _create_buffer(size_in_bytes):
+        buffer_ref = ResourceRegistry.create_buffer()
+        # The copy target leaves the element binding of a currently bound VAO alone
+        GLState.bind_buffer(GL.GL_COPY_WRITE_BUFFER, buffer_ref)
+        GL.glBufferData(GL.GL_COPY_WRITE_BUFFER, size_in_bytes, None, GL.GL_STATIC_DRAW)
+        ResourceRegistry.set_size("buffer", buffer_ref, size_in_bytes)
+        return buffer_ref
+
+    def _upload(self, budget):
+        """ Upload at most budget bytes of the remaining data; returns the number of bytes sent """
+        sent = 0
+        while self._uploads and sent < budget:
+            upload = self._uploads[0]
+            buffer_ref, data, offset = upload
+            chunk = data[offset:offset + budget - sent]
+            GLState.bind_buffer(GL.GL_COPY_WRITE_BUFFER, buffer_ref)
+            GL.glBufferSubData(GL.GL_COPY_WRITE_BUFFER, offset, chunk.nbytes, chunk)
+            upload[2] += chunk.nbytes
+            sent += chunk.nbytes
+            if upload[2] == len(data):
+                self._uploads.pop(0)
+        self._bytes_uploaded += sent
+        ResourceRegistry.record_upload(sent)
+        if not self._uploads:
+            self._finish()
+        return sent
+
+    def _finish(self):
+        """ All data is resident: record the vertex array so the mesh can be drawn """
+        self._vertex_array = VertexArray(self._program_ref)
+        self._vertex_array.add_vertex_layout(self._vertex_layout, self._vertex_buffer_ref)
+        if self._index_buffer_ref is not None:
+            self._vertex_array.set_index_buffer(self._index_buffer_ref)
+        GLState.bind_vertex_array(0)
+        self._state = "resident"
+
+    def _fail(self, error):
+        self._error = error
+        self._state = "failed"
+
+    def draw(self, mode=GL.GL_TRIANGLES):
+        """ Draw the mesh if it is resident; returns whether anything was drawn """
+        if self._state != "resident":
+            return False
+        self._vertex_array.bind()
+        if self._index_buffer_ref is not None:
+            GL.glDrawElements(mode, self._index_count, GL.GL_UNSIGNED_INT, buffer_offset(0))
+        else:
+            GL.glDrawArrays(mode, 0, self._vertex_count)
+        return True
+
+    def delete(self):
+        """ Free the GPU objects; a mesh still building or uploading is dropped by its loader """
+        if self._state in ("building", "uploading") and self._loader is not None:
+            self._loader._discard(self)
+        self._state = "deleted"
+        if self._vertex_array is not None:
+            self._vertex_array.delete()
+            self._vertex_array = None
+        for buffer_ref in (self._vertex_buffer_ref, self._index_buffer_ref):
+            if buffer_ref is not None:
+                ResourceRegistry.delete_buffer(buffer_ref)
+        self._vertex_buffer_ref = None
+        self._index_buffer_ref = None
+        self._uploads = []
+
+
+class GeometryLoader:
+    """
+    Builds mesh data off the GUI thread and uploads it on the GL thread in slices, so loading a
+    large model is spread over several frames instead of freezing the window in initializeGL.
+
+    Usage:
+        loader = GeometryLoader(frame_budget=4 * 1024 * 1024)
+        mesh = loader.load(vertex_layout, program_ref, build_function, *args)
+        # every frame, with the GL context current:
+        loader.update()
+        mesh.draw()          # draws once the mesh is resident
+
+    build_function runs in a worker and returns the vertices (e.g. from vertex_layout.pack) or a
+    (vertices, indices) pair; the conversion to contiguous upload-ready arrays also happens in the
+    worker. A ProcessPoolExecutor can be passed as executor if build_function and its arguments
+    can be pickled.
+    """
+    def __init__(self, frame_budget=4 * 1024 * 1024, executor=None):
+        # bytes uploaded per update() call at most
+        self._frame_budget = frame_budget
+        self._owns_executor = executor is None
+        self._executor = executor if executor is not None else ThreadPoolExecutor(max_workers=1)
+        # (mesh, future) pairs whose build finished; filled by worker threads
+        self._built = queue.Queue()
+        # meshes with data left to upload, in request order
+        self._uploading = deque()
+        self._pending = []
+        # meshes that finished, resident or failed
+        self._done_count = 0
+
+    @property
+    def frame_budget(self):
+        return self._frame_budget
+
+    @frame_budget.setter
+    def frame_budget(self, frame_budget):
+        self._frame_budget = frame_budget
+
+    @property
+    def pending_count(self):
+        """ Number of meshes that are neither resident nor failed """
+        return len(self._pending)
+
+    @property
+    def progress(self):
+        """ Fraction of all requested meshes that is resident (failed meshes count as done) """
+        if not self._pending:
+            return 1.0
+        done = self._done_count + sum(mesh.progress for mesh in self._pending)
+        return done / (self._done_count + len(self._pending))
+
+    @staticmethod
+    def _build(dtype, build_function, args):
+        """ Runs in the worker: build the data and convert it to contiguous upload-ready arrays """
+        result = build_function(*args)
+        vertices, indices = result if isinstance(result, tuple) else (result, None)
+        vertices = np.ascontiguousarray(vertices, dtype=dtype)
+        if indices is not None:
+            indices = np.ascontiguousarray(indices, dtype=np.uint32).reshape(-1)
+        return vertices, indices
+
+    def load(self, vertex_layout, program_ref, build_function, *args):
+        """ Start building a mesh in the background and return its LoadedMesh handle """
+        mesh = LoadedMesh(vertex_layout, program_ref, self)
+        future = self._executor.submit(GeometryLoader._build, vertex_layout.dtype, build_function, args)
+        mesh._future = future
+        future.add_done_callback(lambda done: self._built.put((mesh, done)))
+        self._pending.append(mesh)
+        return mesh
+
+    def update(self):
+        """
+        Call once per frame on the GL thread: start uploads of newly built meshes and send
+        up to frame_budget bytes. Returns the number of bytes uploaded.
+        """
+        while True:
+            try:
+                mesh, future = self._built.get_nowait()
+            except queue.Empty:
+                break
+            # The mesh was deleted while building: drop the data without allocating GPU buffers
+            if future.cancelled() or mesh.state == "deleted":
+                continue
+            error = future.exception()
+            if error is not None:
+                mesh._fail(error)
+                self._retire(mesh)
+                continue
+            mesh._start_upload(*future.result())
+            self._uploading.append(mesh)
+
+        sent = 0
+        while self._uploading and sent < self._frame_budget:
+            mesh = self._uploading[0]
+            sent += mesh._upload(self._frame_budget - sent)
+            if mesh.is_resident:
+                self._uploading.popleft()
+                self._retire(mesh)
+        return sent
+
+    def _discard(self, mesh):
+        """ Forget a mesh deleted before it became resident """
+        if mesh._future is not None:
+            mesh._future.cancel()
+        if mesh in self._uploading:
+            self._uploading.remove(mesh)
+        if mesh in self._pending:
+            self._pending.remove(mesh)
+
+    def _retire(self, mesh):
+        self._pending.remove(mesh)
+        self._done_count += 1
+
+    def shutdown(self, wait=True):
+        """ Stop the worker threads if the loader created them """
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait)
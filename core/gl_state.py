@@ -0,0 +1,107 @@
+import OpenGL.GL as GL
+
+
+class GLState:
+    """
+    Static methods through which core binds programs, buffers and vertex arrays, toggles
+    capabilities and sets the clear color. The last value set is remembered, and a call that would
+    set the value already in place is skipped instead of going through PyOpenGL and the driver.
+
+    The cache only knows about calls made through GLState, so every bind in this repository goes
+    through it, examples and benchmarks included. After changing any of this state with GL functions
+    directly (or after another library did, e.g. a QPainter), call invalidate().
+    GL_ELEMENT_ARRAY_BUFFER is never cached, its binding is part of the bound vertex array.
+    """
+    # state key -> value last set, e.g. ("buffer", GL_ARRAY_BUFFER) -> buffer reference.
+    # Missing key: unknown, the next call always reaches GL.
+    _current = {}
+    # calls since begin_frame(), and the totals of the previous frame
+    counters = {"issued": 0, "skipped": 0}
+    last_frame_counters = {"issued": 0, "skipped": 0}
+
+    @staticmethod
+    def _set(key, value):
+        """ Remember value for key; returns False if it was already set, so the GL call can be skipped """
+        if GLState._current.get(key) == value:
+            GLState.counters["skipped"] += 1
+            return False
+        GLState._current[key] = value
+        GLState.counters["issued"] += 1
+        return True
+
+    @staticmethod
+    def use_program(program_ref):
+        if GLState._set("program", program_ref):
+            GL.glUseProgram(program_ref)
+
+    @staticmethod
+    def bind_buffer(target, buffer_ref):
+        if target == GL.GL_ELEMENT_ARRAY_BUFFER:
+            GL.glBindBuffer(target, buffer_ref)
+        elif GLState._set(("buffer", target), buffer_ref):
+            GL.glBindBuffer(target, buffer_ref)
+
+    @staticmethod
+    def bind_buffer_base(target, index, buffer_ref):
+        """ Attach a buffer to an indexed binding point (uniform or shader storage block) """
+        if GLState._set(("buffer", target, index), buffer_ref):
+            GL.glBindBufferBase(target, index, buffer_ref)
+        # glBindBufferBase also binds the buffer to the generic target
+        GLState._current[("buffer", target)] = buffer_ref
+
+    @staticmethod
+    def bind_vertex_array(vao_ref):
+        if GLState._set("vertex_array", vao_ref):
+            GL.glBindVertexArray(vao_ref)
+
+    @staticmethod
+    def enable(capability):
+        if GLState._set(("capability", capability), True):
+            GL.glEnable(capability)
+
+    @staticmethod
+    def disable(capability):
+        if GLState._set(("capability", capability), False):
+            GL.glDisable(capability)
+
+    @staticmethod
+    def clear_color(red, green, blue, alpha):
+        if GLState._set("clear_color", (red, green, blue, alpha)):
+            GL.glClearColor(red, green, blue, alpha)
+
+    # Deleted objects are unbound by GL; forget them so binding a new object with a reused
+    # reference is not skipped
+
+    @staticmethod
+    def forget_buffer(buffer_ref):
+        for key in [key for key, value in GLState._current.items()
+                    if isinstance(key, tuple) and key[0] == "buffer" and value == buffer_ref]:
+            del GLState._current[key]
+
+    @staticmethod
+    def forget_vertex_array(vao_ref):
+        if GLState._current.get("vertex_array") == vao_ref:
+            del GLState._current["vertex_array"]
+
+    @staticmethod
+    def forget_program(program_ref):
+        if GLState._current.get("program") == program_ref:
+            del GLState._current["program"]
+
+    @staticmethod
+    def invalidate():
+        """ Forget all cached state, e.g. after GL calls made outside of GLState or a new context """
+        GLState._current.clear()
+
+    # Statistics
+
+    @staticmethod
+    def begin_frame():
+        """ Start counting calls for a new frame """
+        GLState.last_frame_counters.update(GLState.counters)
+        GLState.counters.update(issued=0, skipped=0)
+
+    @staticmethod
+    def skipped_last_frame():
+        """ Number of redundant calls skipped during the previous frame """
+        return GLState.last_frame_counters["skipped"]
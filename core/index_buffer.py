@@ -0,0 +1,143 @@
+from ctypes import c_void_p as buffer_offset
+
+import OpenGL.GL as GL
+import numpy as np
+
+from core.attribute import Attribute
+from core.gl_state import GLState
+from core.resources import ResourceRegistry
+
+
+class IndexBuffer:
+    """
+    Element index buffer, the counterpart of Attribute for indices. The narrowest index type that
+    can hold the largest index is chosen (uint8, uint16 or uint32), and the largest value of that
+    type is reserved as the primitive restart index, which is the value
+    GL_PRIMITIVE_RESTART_FIXED_INDEX uses. The count and GL type are kept for the draw calls.
+    """
+    # Index types from narrow to wide: numpy type -> GL type
+    TYPES = {
+        np.uint8: GL.GL_UNSIGNED_BYTE,
+        np.uint16: GL.GL_UNSIGNED_SHORT,
+        np.uint32: GL.GL_UNSIGNED_INT,
+    }
+
+    def __init__(self, indices, restart_tag=None, usage="static", index_type=None):
+        # value in indices that marks a primitive restart (e.g. 99 or -1); replaced by restart_index
+        self._restart_tag = restart_tag
+        if usage not in Attribute.USAGE_HINTS:
+            raise Exception(f'IndexBuffer has unknown usage {usage}')
+        self._usage = usage
+        # numpy type forced by the caller; None selects the narrowest type that fits
+        if index_type is not None and index_type not in IndexBuffer.TYPES:
+            raise Exception(f'IndexBuffer has unknown index type {index_type}')
+        self._requested_type = index_type
+        self._indices = indices
+        self._data = None
+        # reference of available buffer from GPU
+        self._buffer_ref = ResourceRegistry.create_buffer()
+        # Upload data immediately
+        self.upload_data()
+
+    @property
+    def buffer_ref(self):
+        return self._buffer_ref
+
+    @property
+    def data(self):
+        """ Indices in the stored type, with restart tags replaced by restart_index """
+        return self._data
+
+    @property
+    def indices(self):
+        return self._indices
+
+    @indices.setter
+    def indices(self, indices):
+        self._indices = indices
+
+    @property
+    def count(self):
+        return len(self._data)
+
+    @property
+    def index_type(self):
+        return self._data.dtype.type
+
+    @property
+    def gl_type(self):
+        return IndexBuffer.TYPES[self._data.dtype.type]
+
+    @property
+    def restart_index(self):
+        return np.iinfo(self._data.dtype).max
+
+    @staticmethod
+    def select_type(max_index):
+        """ Narrowest index type whose largest value (kept for restarts) is above max_index """
+        for index_type in IndexBuffer.TYPES:
+            if max_index < np.iinfo(index_type).max:
+                return index_type
+        raise Exception(f'Index {max_index} does not fit in 32 bits')
+
+    @staticmethod
+    def _source_restart_tag(restart_tag, dtype):
+        """ The restart tag as a value of the source indices; -1 stands for the largest unsigned value """
+        if not np.issubdtype(dtype, np.integer):
+            return restart_tag
+        info = np.iinfo(dtype)
+        if info.min <= restart_tag <= info.max:
+            return restart_tag
+        if restart_tag == -1 and info.min == 0:
+            return info.max
+        raise Exception(f'Restart tag {restart_tag} cannot occur in {dtype.name} indices')
+
+    def _convert_indices(self):
+        indices = np.asarray(self._indices).reshape(-1)
+        if self._restart_tag is not None:
+            restart = indices == IndexBuffer._source_restart_tag(self._restart_tag, indices.dtype)
+            max_index = int(indices[~restart].max(initial=0))
+        else:
+            restart = None
+            max_index = int(indices.max(initial=0))
+        index_type = self._requested_type or IndexBuffer.select_type(max_index)
+        if max_index >= np.iinfo(index_type).max:
+            raise Exception(f'Index {max_index} does not fit in {np.dtype(index_type).name}')
+        data = indices.astype(index_type)
+        if restart is not None:
+            data[restart] = np.iinfo(index_type).max
+        return data
+
+    def upload_data(self):
+        """ Convert the indices and upload them to the GPU buffer """
+        self._data = self._convert_indices()
+        # Use the copy target so the upload does not change the element binding of a bound VAO
+        GLState.bind_buffer(GL.GL_COPY_WRITE_BUFFER, self._buffer_ref)
+        GL.glBufferData(GL.GL_COPY_WRITE_BUFFER, self._data.nbytes, self._data, Attribute.USAGE_HINTS[self._usage])
+        ResourceRegistry.set_size("buffer", self._buffer_ref, self._data.nbytes)
+        ResourceRegistry.record_upload(self._data.nbytes)
+
+    def bind(self):
+        """ Bind as element array buffer; with a VAO bound, this records the buffer in the VAO """
+        GLState.bind_buffer(GL.GL_ELEMENT_ARRAY_BUFFER, self._buffer_ref)
+
+    def enable_primitive_restart(self, fixed_index=False):
+        """
+        Enable primitive restart at restart_index. fixed_index uses GL_PRIMITIVE_RESTART_FIXED_INDEX
+        (OpenGL 4.3), which always restarts at the largest value of the index type drawn.
+        """
+        if fixed_index:
+            GLState.enable(GL.GL_PRIMITIVE_RESTART_FIXED_INDEX)
+        else:
+            GLState.enable(GL.GL_PRIMITIVE_RESTART)
+            GL.glPrimitiveRestartIndex(self.restart_index)
+
+    def draw(self, mode=GL.GL_TRIANGLES, count=None, first=0):
+        """ Draw count indices starting at index first; the buffer must be bound (e.g. through a VAO) """
+        if count is None:
+            count = self.count - first
+        GL.glDrawElements(mode, count, self.gl_type, buffer_offset(first * self._data.itemsize))
+
+    def delete(self):
+        """ Free the GPU buffer """
+        ResourceRegistry.delete_buffer(self._buffer_ref)
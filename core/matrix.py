@@ -6,91 +6,108 @@ class Matrix:
     """
     Contains static methods to generate matrices (with the numpy library) corresponding
     to identity, translation, rotation (around each axis), scaling, and projection.
+
+    The make_*s variants (plural) are batched: they take arrays of N parameters
+    and return an (N, 4, 4) float32 stack built with a few vectorized numpy operations.
+
+    The scalar methods accept an optional out array, a preallocated contiguous 4x4 that is
+    overwritten in place, and a dtype for newly created matrices. Passing a float32 out array
+    produces the matrix directly in the format glUniformMatrix4fv uploads, so no numpy array
+    is allocated or converted per frame.
     """
     @staticmethod
-    def make_identity():
-        return np.array(
-            [[1, 0, 0, 0],
-             [0, 1, 0, 0],
-             [0, 0, 1, 0],
-             [0, 0, 0, 1]]
-        ).astype(float)
+    def _reset(out, dtype):
+        """ Return out (or a new 4x4 array of the given dtype) reset to the identity matrix """
+        if out is None:
+            out = np.empty((4, 4), dtype=dtype)
+        out.fill(0)
+        out[0, 0] = 1
+        out[1, 1] = 1
+        out[2, 2] = 1
+        out[3, 3] = 1
+        return out
 
     @staticmethod
-    def make_translation(x, y, z):
-        return np.array(
-            [[1, 0, 0, x],
-             [0, 1, 0, y],
-             [0, 0, 1, z],
-             [0, 0, 0, 1]]
-        ).astype(float)
+    def make_identity(out=None, dtype=float):
+        return Matrix._reset(out, dtype)
 
     @staticmethod
-    def make_rotation_x(angle):
+    def make_translation(x, y, z, out=None, dtype=float):
+        m = Matrix._reset(out, dtype)
+        m[0, 3] = x
+        m[1, 3] = y
+        m[2, 3] = z
+        return m
+
+    @staticmethod
+    def make_rotation_x(angle, out=None, dtype=float):
         c = math.cos(angle)
         s = math.sin(angle)
-        return np.array(
-            [[1,  0,  0,  0],
-             [0,  c, -s,  0],
-             [0,  s,  c,  0],
-             [0,  0,  0,  1]]
-        ).astype(float)
+        m = Matrix._reset(out, dtype)
+        m[1, 1] = c
+        m[1, 2] = -s
+        m[2, 1] = s
+        m[2, 2] = c
+        return m
 
     @staticmethod
-    def make_rotation_y(angle):
+    def make_rotation_y(angle, out=None, dtype=float):
         c = math.cos(angle)
         s = math.sin(angle)
-        return np.array(
-            [[c,  0,  s,  0],
-             [0,  1,  0,  0],
-             [-s, 0,  c,  0],
-             [0,  0,  0,  1]]
-        ).astype(float)
+        m = Matrix._reset(out, dtype)
+        m[0, 0] = c
+        m[0, 2] = s
+        m[2, 0] = -s
+        m[2, 2] = c
+        return m
 
     @staticmethod
-    def make_rotation_z(angle):
+    def make_rotation_z(angle, out=None, dtype=float):
         c = math.cos(angle)
         s = math.sin(angle)
-        return np.array(
-            [[c, -s,  0,  0],
-             [s,  c,  0,  0],
-             [0,  0,  1,  0],
-             [0,  0,  0,  1]]
-        ).astype(float)
+        m = Matrix._reset(out, dtype)
+        m[0, 0] = c
+        m[0, 1] = -s
+        m[1, 0] = s
+        m[1, 1] = c
+        return m
 
     @staticmethod
-    def make_scale(s):
-        return np.array(
-            [[s, 0, 0, 0],
-             [0, s, 0, 0],
-             [0, 0, s, 0],
-             [0, 0, 0, 1]]
-        ).astype(float)
+    def make_scale(s, out=None, dtype=float):
+        m = Matrix._reset(out, dtype)
+        m[0, 0] = s
+        m[1, 1] = s
+        m[2, 2] = s
+        return m
 
     @staticmethod
-    def make_perspective(angle_of_view=60, aspect_ratio=1, near=0.1, far=1000):
+    def make_perspective(angle_of_view=60, aspect_ratio=1, near=0.1, far=1000, out=None, dtype=float):
         a = angle_of_view * math.pi / 180.0
         d = 1.0 / math.tan(a / 2)
         b = (far + near) / (near - far)
         c = 2 * far * near / (near - far)
-        return np.array(
-            [[d / aspect_ratio, 0, 0, 0],
-             [0, d, 0, 0],
-             [0, 0, b, c],
-             [0, 0, -1, 0]]
-        ).astype(float)
+        m = Matrix._reset(out, dtype)
+        m[0, 0] = d / aspect_ratio
+        m[1, 1] = d
+        m[2, 2] = b
+        m[2, 3] = c
+        m[3, 2] = -1
+        m[3, 3] = 0
+        return m
 
     @staticmethod
-    def make_orthographic(left=-1, right=1, bottom=-1, top=1, near=-1, far=1):
-        return np.array(
-            [[2 / (right - left), 0, 0, -(right + left) / (right - left)],
-             [0, 2 / (top - bottom), 0, -(top + bottom) / (top - bottom)],
-             [0, 0, -2 / (far - near), -(far + near) / (far - near)],
-             [0, 0, 0, 1]]
-        ).astype(float)
+    def make_orthographic(left=-1, right=1, bottom=-1, top=1, near=-1, far=1, out=None, dtype=float):
+        m = Matrix._reset(out, dtype)
+        m[0, 0] = 2 / (right - left)
+        m[0, 3] = -(right + left) / (right - left)
+        m[1, 1] = 2 / (top - bottom)
+        m[1, 3] = -(top + bottom) / (top - bottom)
+        m[2, 2] = -2 / (far - near)
+        m[2, 3] = -(far + near) / (far - near)
+        return m
 
     @staticmethod
-    def make_look_at(global_pos, target_pos):
+    def make_look_at(global_pos, target_pos, out=None, dtype=float):
         world_up = [0, 1, 0]
         forward = np.subtract(target_pos, global_pos)
         right = np.cross(forward, world_up)
@@ -105,9 +122,164 @@ class Matrix:
         forward = np.divide(forward, np.linalg.norm(forward))
         right = np.divide(right, np.linalg.norm(right))
         up = np.divide(up, np.linalg.norm(up))
-        return np.array(
-            [[right[0], up[0], -forward[0], global_pos[0]],
-             [right[1], up[1], -forward[1], global_pos[1]],
-             [right[2], up[2], -forward[2], global_pos[2]],
-             [0, 0, 0, 1]]
-        ).astype(float)
+        m = Matrix._reset(out, dtype)
+        m[:3, 0] = right
+        m[:3, 1] = up
+        m[:3, 2] = -forward
+        m[:3, 3] = global_pos
+        return m
+
+    @staticmethod
+    def make_identities(n, dtype=np.float32):
+        """ Return a stack of n identity matrices with shape (n, 4, 4) """
+        matrices = np.zeros((n, 4, 4), dtype=dtype)
+        # Every 5th element of a flattened 4x4 lies on the diagonal
+        matrices.reshape(n, 16)[:, ::5] = 1
+        return matrices
+
+    @staticmethod
+    def make_translations(positions):
+        """ Batched make_translation; positions has shape (N, 3) """
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        matrices = Matrix.make_identities(len(positions))
+        matrices[:, :3, 3] = positions
+        return matrices
+
+    @staticmethod
+    def make_rotations_x(angles):
+        """ Batched make_rotation_x; angles has shape (N,) """
+        angles = np.asarray(angles, dtype=np.float32).ravel()
+        c = np.cos(angles)
+        s = np.sin(angles)
+        matrices = Matrix.make_identities(len(angles))
+        matrices[:, 1, 1] = c
+        matrices[:, 1, 2] = -s
+        matrices[:, 2, 1] = s
+        matrices[:, 2, 2] = c
+        return matrices
+
+    @staticmethod
+    def make_rotations_y(angles):
+        """ Batched make_rotation_y; angles has shape (N,) """
+        angles = np.asarray(angles, dtype=np.float32).ravel()
+        c = np.cos(angles)
+        s = np.sin(angles)
+        matrices = Matrix.make_identities(len(angles))
+        matrices[:, 0, 0] = c
+        matrices[:, 0, 2] = s
+        matrices[:, 2, 0] = -s
+        matrices[:, 2, 2] = c
+        return matrices
+
+    @staticmethod
+    def make_rotations_z(angles):
+        """ Batched make_rotation_z; angles has shape (N,) """
+        angles = np.asarray(angles, dtype=np.float32).ravel()
+        c = np.cos(angles)
+        s = np.sin(angles)
+        matrices = Matrix.make_identities(len(angles))
+        matrices[:, 0, 0] = c
+        matrices[:, 0, 1] = -s
+        matrices[:, 1, 0] = s
+        matrices[:, 1, 1] = c
+        return matrices
+
+    @staticmethod
+    def make_scales(scales):
+        """
+        Batched make_scale; scales has shape (N,) for uniform scaling
+        or (N, 3) for a separate factor per axis
+        """
+        scales = np.asarray(scales, dtype=np.float32)
+        if scales.ndim < 2:
+            scales = np.repeat(scales.reshape(-1, 1), 3, axis=1)
+        matrices = Matrix.make_identities(len(scales))
+        # Write the three scale factors onto the diagonal of each matrix
+        matrices.reshape(-1, 16)[:, 0:11:5] = scales
+        return matrices
+
+    @staticmethod
+    def compose(a, b, out=None):
+        """
+        Matrix product a @ b over stacks of matrices.
+        Shapes broadcast, so a single (4, 4) matrix can be composed with an (N, 4, 4) stack.
+        """
+        return np.matmul(a, b, out=out)
+
+    @staticmethod
+    def inverse_rigid(m):
+        """
+        Inverse of rotation + translation matrices, (4, 4) or (N, 4, 4), computed analytically:
+        the transposed rotation and the translation rotated back and negated
+        """
+        m = np.asarray(m)
+        rotation_t = np.swapaxes(m[..., :3, :3], -1, -2)
+        inverse = np.zeros_like(m)
+        inverse[..., :3, :3] = rotation_t
+        inverse[..., :3, 3] = -np.einsum('...ij,...j->...i', rotation_t, m[..., :3, 3])
+        inverse[..., 3, 3] = 1
+        return inverse
+
+    @staticmethod
+    def _inverse_transposed_3x3(a):
+        """ Transposed inverse of (..., 3, 3) matrices via cross products of their rows """
+        r0, r1, r2 = a[..., 0, :], a[..., 1, :], a[..., 2, :]
+        cofactors = np.stack([np.cross(r1, r2), np.cross(r2, r0), np.cross(r0, r1)], axis=-2)
+        determinants = np.sum(r0 * cofactors[..., 0, :], axis=-1)
+        return cofactors / determinants[..., None, None]
+
+    @staticmethod
+    def inverse_affine(m):
+        """ Inverse of affine matrices (last row 0, 0, 0, 1), (4, 4) or (N, 4, 4), without np.linalg.inv """
+        m = np.asarray(m)
+        linear_inverse = np.swapaxes(Matrix._inverse_transposed_3x3(m[..., :3, :3]), -1, -2)
+        inverse = np.zeros_like(m)
+        inverse[..., :3, :3] = linear_inverse
+        inverse[..., :3, 3] = -np.einsum('...ij,...j->...i', linear_inverse, m[..., :3, 3])
+        inverse[..., 3, 3] = 1
+        return inverse
+
+    @staticmethod
+    def make_normal_matrix(m, rigid=False):
+        """
+        3x3 matrix that transforms normals by model(-view) matrices m, (4, 4) or (N, 4, 4):
+        the transposed inverse of the upper-left 3x3, which for rigid transforms is the rotation itself
+        """
+        m = np.asarray(m)
+        if rigid:
+            return m[..., :3, :3].copy()
+        return Matrix._inverse_transposed_3x3(m[..., :3, :3]).astype(m.dtype)
+
+
+class NormalMatrixCache:
+    """
+    Normal matrices for a stack of model matrices, recomputed only for the matrices whose
+    version changed since the last call (for example core.scene_graph.SceneGraph.versions)
+    """
+    def __init__(self, rigid=False):
+        self._rigid = rigid
+        self._normal_matrices = np.zeros((0, 3, 3), dtype=np.float32)
+        self._versions = np.zeros(0, dtype=np.uint64)
+        self._valid = np.zeros(0, dtype=bool)
+
+    @property
+    def normal_matrices(self):
+        return self._normal_matrices
+
+    def update(self, matrices, versions):
+        """ Return (N, 3, 3) normal matrices for matrices (N, 4, 4) with version counters (N,) """
+        count = len(matrices)
+        if count > len(self._valid):
+            self._grow(count)
+        stale = ~self._valid[:count] | (self._versions[:count] != versions)
+        if stale.any():
+            self._normal_matrices[:count][stale] = Matrix.make_normal_matrix(matrices[stale], self._rigid)
+            self._versions[:count][stale] = np.asarray(versions)[stale]
+            self._valid[:count][stale] = True
+        return self._normal_matrices[:count]
+
+    def _grow(self, count):
+        old = len(self._valid)
+        self._normal_matrices = np.concatenate([self._normal_matrices, np.zeros((count - old, 3, 3), dtype=np.float32)])
+        self._versions = np.concatenate([self._versions, np.zeros(count - old, dtype=np.uint64)])
+        self._valid = np.concatenate([self._valid, np.zeros(count - old, dtype=bool)])
@@ -0,0 +1,144 @@
+import OpenGL.GL as GL
+
+from core.gl_state import GLState
+from core.matrix import Matrix
+from core.resources import ResourceRegistry
+
+
+class MatrixArena:
+    """
+    Contiguous storage for many 4x4 matrices (for example the model matrices of all objects in a scene).
+    Slots are handed out as views into one (capacity, 4, 4) float32 array; changed slots are tracked,
+    and upload() sends the dirty range to a GPU buffer with a single glBufferSubData call per frame.
+
+    The matrices are stored row by row like core.matrix.Matrix, so the shader has to declare
+    the block as row_major, for example:
+        layout (std140, row_major) uniform ModelMatrices { mat4 modelMatrix[256]; };
+    A uniform block holds at least 16 KB (256 matrices). Larger arenas can use a shader storage
+    buffer (GL_SHADER_STORAGE_BUFFER, OpenGL 4.3, not available in the 4.1 context used on macOS):
+        layout (std430, binding = 0, row_major) buffer ModelMatrices { mat4 modelMatrix[]; };
+    """
+    def __init__(self, capacity, target=GL.GL_UNIFORM_BUFFER):
+        self._matrices = Matrix.make_identities(capacity)
+        # GL_UNIFORM_BUFFER or GL_SHADER_STORAGE_BUFFER
+        self._target = target
+        # Slots below _high_water have been handed out at least once
+        self._high_water = 0
+        self._free_slots = set()
+        # Inclusive range of slots changed since the last upload; empty when _dirty_min > _dirty_max
+        self._dirty_min = capacity
+        self._dirty_max = -1
+        # reference of GPU buffer; generated on first upload, when a GL context is current
+        self._buffer_ref = None
+
+    @staticmethod
+    def is_shader_storage_supported():
+        """ True if the current context provides shader storage buffers (OpenGL 4.3) """
+        version = (GL.glGetIntegerv(GL.GL_MAJOR_VERSION), GL.glGetIntegerv(GL.GL_MINOR_VERSION))
+        return version >= (4, 3)
+
+    @property
+    def capacity(self):
+        return len(self._matrices)
+
+    @property
+    def matrices(self):
+        """ View of all slots handed out so far, in slot order """
+        return self._matrices[:self._high_water]
+
+    @property
+    def buffer_ref(self):
+        return self._buffer_ref
+
+    @property
+    def has_changes(self):
+        return self._dirty_min <= self._dirty_max
+
+    def allocate(self, matrix=None):
+        """ Reserve a slot (initialized to matrix or the identity) and return its index """
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        elif self._high_water < len(self._matrices):
+            slot = self._high_water
+            self._high_water += 1
+        else:
+            raise Exception(f'MatrixArena is full (capacity {len(self._matrices)})')
+        if matrix is None:
+            Matrix.make_identity(out=self._matrices[slot])
+        else:
+            self._matrices[slot] = matrix
+        self.mark_dirty(slot)
+        return slot
+
+    def free(self, slot):
+        """ Return a slot to the arena; its contents are reset to the identity """
+        if not 0 <= slot < self._high_water or slot in self._free_slots:
+            raise Exception(f'MatrixArena slot {slot} is not allocated')
+        Matrix.make_identity(out=self._matrices[slot])
+        self.mark_dirty(slot)
+        self._free_slots.add(slot)
+
+    def view(self, slot):
+        """ Writable (4, 4) view of a slot; call mark_dirty(slot) after writing through it """
+        return self._matrices[slot]
+
+    def set(self, slot, matrix):
+        self._matrices[slot] = matrix
+        self.mark_dirty(slot)
+
+    def mark_dirty(self, first_slot, last_slot=None):
+        """ Flag the inclusive slot range [first_slot, last_slot] for the next upload """
+        if last_slot is None:
+            last_slot = first_slot
+        self._dirty_min = min(self._dirty_min, first_slot)
+        self._dirty_max = max(self._dirty_max, last_slot)
+
+    def upload(self):
+        """ Upload the changed range to the GPU buffer; returns the number of bytes sent """
+        if self._buffer_ref is None:
+            self._check_target()
+            self._buffer_ref = ResourceRegistry.create_buffer()
+            GLState.bind_buffer(self._target, self._buffer_ref)
+            # Allocate the whole arena once; later frames only update the dirty range
+            GL.glBufferData(self._target, self._matrices.nbytes, self._matrices, GL.GL_DYNAMIC_DRAW)
+            ResourceRegistry.set_size("buffer", self._buffer_ref, self._matrices.nbytes)
+            ResourceRegistry.record_upload(self._matrices.nbytes)
+            self._clear_dirty()
+            return self._matrices.nbytes
+        if not self.has_changes:
+            return 0
+        data = self._matrices[self._dirty_min:self._dirty_max + 1]
+        offset = self._dirty_min * self._matrices[0].nbytes
+        GLState.bind_buffer(self._target, self._buffer_ref)
+        GL.glBufferSubData(self._target, offset, data.nbytes, data)
+        ResourceRegistry.record_upload(data.nbytes)
+        self._clear_dirty()
+        return data.nbytes
+
+    def bind(self, binding_point):
+        """ Attach the GPU buffer to an indexed binding point shared by all programs """
+        if self._buffer_ref is None:
+            raise Exception('MatrixArena has no GPU buffer yet; call upload() before bind()')
+        GLState.bind_buffer_base(self._target, binding_point, self._buffer_ref)
+
+    def delete(self):
+        """ Free the GPU buffer; the CPU copy stays valid and is uploaded again on the next upload() """
+        if self._buffer_ref is not None:
+            ResourceRegistry.delete_buffer(self._buffer_ref)
+            self._buffer_ref = None
+
+    def _check_target(self):
+        """ Raise if the current context cannot hold the arena in a buffer of the chosen target """
+        if self._target == GL.GL_SHADER_STORAGE_BUFFER:
+            if not MatrixArena.is_shader_storage_supported():
+                raise Exception('MatrixArena with GL_SHADER_STORAGE_BUFFER needs OpenGL 4.3; '
+                                'use GL_UNIFORM_BUFFER')
+        elif self._target == GL.GL_UNIFORM_BUFFER:
+            max_size = GL.glGetIntegerv(GL.GL_MAX_UNIFORM_BLOCK_SIZE)
+            if self._matrices.nbytes > max_size:
+                raise Exception(f'MatrixArena of {len(self._matrices)} matrices exceeds the uniform block '
+                                f'size limit of {max_size} bytes; use GL_SHADER_STORAGE_BUFFER')
+
+    def _clear_dirty(self):
+        self._dirty_min = len(self._matrices)
+        self._dirty_max = -1
@@ -0,0 +1,109 @@
+import ctypes
+from collections import namedtuple
+
+import OpenGL.GL as GL
+
+# Active variable of a linked program: location, array size (1 if not an array) and GL type
+VariableInfo = namedtuple('VariableInfo', ['location', 'size', 'gl_type'])
+# Active uniform block: block index and data size in bytes
+BlockInfo = namedtuple('BlockInfo', ['index', 'size'])
+
+
+class Program(int):
+    """
+    Linked shader program. It is the program reference (an int, so it can be passed to any GL
+    function as before) and enumerates the active uniforms, attributes and uniform blocks once,
+    when it is created. Location lookups by name are then dictionary hits that never reach the driver.
+
+    Array variables are registered under their plain name, "name[0]" and every "name[k]";
+    members of uniform blocks are not, since they have no location (see uniform_blocks).
+    """
+    def __new__(cls, program_ref):
+        program = super().__new__(cls, program_ref)
+        program._uniforms = Program._get_active_uniforms(program_ref)
+        program._attributes = Program._get_active_attributes(program_ref)
+        program._uniform_blocks = Program._get_active_uniform_blocks(program_ref)
+        return program
+
+    @property
+    def uniforms(self):
+        """ name -> VariableInfo of every uniform outside of blocks, array elements included """
+        return self._uniforms
+
+    @property
+    def attributes(self):
+        """ name -> VariableInfo of every vertex attribute """
+        return self._attributes
+
+    @property
+    def uniform_blocks(self):
+        """ name -> BlockInfo of every uniform block """
+        return self._uniform_blocks
+
+    def get_uniform_location(self, variable_name):
+        """ Location of a uniform, or -1 if the program does not use it """
+        info = self._uniforms.get(variable_name)
+        return info.location if info is not None else -1
+
+    def get_attribute_location(self, variable_name):
+        """ Location of a vertex attribute, or -1 if the program does not use it """
+        info = self._attributes.get(variable_name)
+        return info.location if info is not None else -1
+
+    def get_uniform_block_index(self, block_name):
+        """ Index of a uniform block, or GL_INVALID_INDEX if the program does not use it """
+        info = self._uniform_blocks.get(block_name)
+        return info.index if info is not None else GL.GL_INVALID_INDEX
+
+    def get_array_length(self, variable_name):
+        """ Active length of a uniform array (1 for other uniforms, 0 if the program does not use it) """
+        info = self._uniforms.get(variable_name)
+        return info.size if info is not None else 0
+
+    @staticmethod
+    def _get_active_uniforms(program_ref):
+        uniforms = {}
+        for index in range(GL.glGetProgramiv(program_ref, GL.GL_ACTIVE_UNIFORMS)):
+            name, size, gl_type = GL.glGetActiveUniform(program_ref, index)
+            name = name.decode('utf-8')
+            location = GL.glGetUniformLocation(program_ref, name)
+            # Members of uniform blocks have no location
+            if location == -1:
+                continue
+            if name.endswith("[0]"):
+                # Arrays are reported by their first element; register every element
+                base_name = name[:-3]
+                uniforms[base_name] = VariableInfo(location, size, gl_type)
+                uniforms[name] = VariableInfo(location, size, gl_type)
+                # size of an element entry counts the elements from it to the end of the array
+                for element in range(1, size):
+                    element_name = f"{base_name}[{element}]"
+                    uniforms[element_name] = VariableInfo(
+                        GL.glGetUniformLocation(program_ref, element_name), size - element, gl_type)
+            else:
+                uniforms[name] = VariableInfo(location, size, gl_type)
+        return uniforms
+
+    @staticmethod
+    def _get_active_attributes(program_ref):
+        attributes = {}
+        for index in range(GL.glGetProgramiv(program_ref, GL.GL_ACTIVE_ATTRIBUTES)):
+            name, size, gl_type = GL.glGetActiveAttrib(program_ref, index)
+            name = name.decode('utf-8')
+            # Built-in inputs such as gl_VertexID are listed by some drivers but have no location
+            location = GL.glGetAttribLocation(program_ref, name)
+            if location != -1:
+                attributes[name] = VariableInfo(location, size, gl_type)
+        return attributes
+
+    @staticmethod
+    def _get_active_uniform_blocks(program_ref):
+        blocks = {}
+        for index in range(GL.glGetProgramiv(program_ref, GL.GL_ACTIVE_UNIFORM_BLOCKS)):
+            value = (GL.GLint * 1)()
+            GL.glGetActiveUniformBlockiv(program_ref, index, GL.GL_UNIFORM_BLOCK_NAME_LENGTH, value)
+            name = ctypes.create_string_buffer(value[0])
+            GL.glGetActiveUniformBlockName(program_ref, index, value[0], None, name)
+            GL.glGetActiveUniformBlockiv(program_ref, index, GL.GL_UNIFORM_BLOCK_DATA_SIZE, value)
+            blocks[name.value.decode('utf-8')] = BlockInfo(index, value[0])
+        return blocks
@@ -0,0 +1,164 @@
+import numpy as np
+
+
+class Quaternion:
+    """
+    Contains static methods for batched unit quaternions (with the numpy library).
+    Quaternions are stored as rows (x, y, z, w) of an (N, 4) float32 array,
+    so thousands of orientations can be built, combined and interpolated in a few vectorized calls.
+    """
+    @staticmethod
+    def make_identities(n):
+        quaternions = np.zeros((n, 4), dtype=np.float32)
+        quaternions[:, 3] = 1
+        return quaternions
+
+    @staticmethod
+    def from_axis_angle(axes, angles):
+        """ Rotations by angles (N,) in radians around axes (N, 3) or a single shared axis (3,) """
+        angles = np.asarray(angles, dtype=np.float32).ravel()
+        axes = np.broadcast_to(np.asarray(axes, dtype=np.float32), (len(angles), 3))
+        axes = axes / np.linalg.norm(axes, axis=1, keepdims=True)
+        half = angles / 2
+        quaternions = np.empty((len(angles), 4), dtype=np.float32)
+        quaternions[:, :3] = axes * np.sin(half)[:, None]
+        quaternions[:, 3] = np.cos(half)
+        return quaternions
+
+    @staticmethod
+    def multiply(a, b):
+        """
+        Hamilton product a * b; the result rotates by b first, then by a,
+        like the matrix product of the corresponding rotation matrices
+        """
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+        a_v, a_w = a[..., :3], a[..., 3:]
+        b_v, b_w = b[..., :3], b[..., 3:]
+        result = np.empty(np.broadcast_shapes(a.shape, b.shape), dtype=np.float32)
+        result[..., :3] = a_w * b_v + b_w * a_v + np.cross(a_v, b_v)
+        result[..., 3] = (a_w * b_w)[..., 0] - np.sum(a_v * b_v, axis=-1)
+        return result
+
+    @staticmethod
+    def conjugate(q):
+        """ Inverse rotation of unit quaternions """
+        q = np.array(q, dtype=np.float32)
+        q[..., :3] *= -1
+        return q
+
+    @staticmethod
+    def normalize(q):
+        q = np.asarray(q, dtype=np.float32)
+        return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+    @staticmethod
+    def rotate_vectors(q, v):
+        """ Rotate vectors v (N, 3) by quaternions q (N, 4) """
+        q = np.asarray(q, dtype=np.float32)
+        v = np.asarray(v, dtype=np.float32)
+        q_v, q_w = q[..., :3], q[..., 3:]
+        # v' = v + 2w(q_v x v) + 2 q_v x (q_v x v)
+        t = 2 * np.cross(q_v, v)
+        return v + q_w * t + np.cross(q_v, t)
+
+    @staticmethod
+    def nlerp(a, b, t):
+        """ Normalized linear interpolation; cheaper than slerp, but not constant speed """
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+        t = np.asarray(t, dtype=np.float32).reshape(-1, 1)
+        # Take the shorter path: q and -q describe the same rotation
+        sign = np.where(np.sum(a * b, axis=-1, keepdims=True) < 0, -1, 1).astype(np.float32)
+        return Quaternion.normalize(a + t * (sign * b - a))
+
+    @staticmethod
+    def slerp(a, b, t):
+        """ Spherical linear interpolation between the rows of a and b at parameters t """
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+        t = np.asarray(t, dtype=np.float32).reshape(-1, 1)
+        dot = np.sum(a * b, axis=-1, keepdims=True)
+        # Take the shorter path: q and -q describe the same rotation
+        b = np.where(dot < 0, -b, b)
+        dot = np.clip(np.abs(dot), 0, 1)
+        theta = np.arccos(dot)
+        sin_theta = np.sin(theta)
+        # For (almost) parallel quaternions sin(theta) vanishes;
+        # fall back to linear weights there, which nlerp renormalizes
+        close = sin_theta < 1e-5
+        safe_sin = np.where(close, 1, sin_theta)
+        weight_a = np.where(close, 1 - t, np.sin((1 - t) * theta) / safe_sin)
+        weight_b = np.where(close, t, np.sin(t * theta) / safe_sin)
+        return Quaternion.normalize(weight_a * a + weight_b * b)
+
+    @staticmethod
+    def to_matrices(q, out=None):
+        """
+        Convert quaternions (N, 4) to an (N, 4, 4) float32 stack of rotation matrices,
+        using the same row-major, column-vector convention as core.matrix.Matrix
+        """
+        q = np.asarray(q, dtype=np.float32).reshape(-1, 4)
+        x, y, z, w = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+        if out is None:
+            out = np.empty((len(q), 4, 4), dtype=np.float32)
+        xx, yy, zz = x * x, y * y, z * z
+        xy, xz, yz = x * y, x * z, y * z
+        wx, wy, wz = w * x, w * y, w * z
+        out[:, 0, 0] = 1 - 2 * (yy + zz)
+        out[:, 0, 1] = 2 * (xy - wz)
+        out[:, 0, 2] = 2 * (xz + wy)
+        out[:, 1, 0] = 2 * (xy + wz)
+        out[:, 1, 1] = 1 - 2 * (xx + zz)
+        out[:, 1, 2] = 2 * (yz - wx)
+        out[:, 2, 0] = 2 * (xz - wy)
+        out[:, 2, 1] = 2 * (yz + wx)
+        out[:, 2, 2] = 1 - 2 * (xx + yy)
+        out[:, :3, 3] = 0
+        out[:, 3, :3] = 0
+        out[:, 3, 3] = 1
+        return out
+
+
+class DualQuaternion:
+    """
+    Contains static methods for batched unit dual quaternions, which describe rigid transforms
+    (rotation followed by translation). They are stored as (N, 8) float32 arrays whose first
+    four columns are the real (rotation) part and last four the dual part, both as (x, y, z, w).
+    """
+    @staticmethod
+    def from_rotation_translation(rotations, translations):
+        rotations = np.asarray(rotations, dtype=np.float32).reshape(-1, 4)
+        translations = np.asarray(translations, dtype=np.float32).reshape(-1, 3)
+        pure = np.zeros((len(translations), 4), dtype=np.float32)
+        pure[:, :3] = translations
+        result = np.empty((len(rotations), 8), dtype=np.float32)
+        result[:, :4] = rotations
+        # dual = 0.5 * t * r, with t as a pure quaternion
+        result[:, 4:] = 0.5 * Quaternion.multiply(pure, rotations)
+        return result
+
+    @staticmethod
+    def multiply(a, b):
+        """ Composition a * b: apply b first, then a """
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+        result = np.empty(np.broadcast_shapes(a.shape, b.shape), dtype=np.float32)
+        result[..., :4] = Quaternion.multiply(a[..., :4], b[..., :4])
+        result[..., 4:] = (Quaternion.multiply(a[..., :4], b[..., 4:])
+                           + Quaternion.multiply(a[..., 4:], b[..., :4]))
+        return result
+
+    @staticmethod
+    def normalize(dq):
+        dq = np.asarray(dq, dtype=np.float32)
+        return dq / np.linalg.norm(dq[..., :4], axis=-1, keepdims=True)
+
+    @staticmethod
+    def to_matrices(dq, out=None):
+        """ Convert dual quaternions (N, 8) to an (N, 4, 4) float32 stack compatible with Matrix """
+        dq = np.asarray(dq, dtype=np.float32).reshape(-1, 8)
+        out = Quaternion.to_matrices(dq[:, :4], out=out)
+        # t = 2 * dual * conjugate(real)
+        out[:, :3, 3] = 2 * Quaternion.multiply(dq[:, 4:], Quaternion.conjugate(dq[:, :4]))[:, :3]
+        return out
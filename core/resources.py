@@ -0,0 +1,179 @@
+import os
+import sys
+from collections import namedtuple
+
+import OpenGL.GL as GL
+
+from core.gl_state import GLState
+
+# One live GPU object: kind (buffer | vertex_array | program | shader | texture | framebuffer),
+# reference from GL, size in bytes (0 if unknown) and "file:line" of the code that created it
+Resource = namedtuple('Resource', ['kind', 'ref', 'size', 'call_site'])
+
+_core_dir = os.path.dirname(os.path.realpath(__file__))
+
+
+class ResourceRegistry:
+    """
+    Static methods to create and delete GPU objects through one place, so live objects,
+    GPU memory per kind and bytes uploaded per frame can be tracked, and objects that were
+    never deleted can be reported (with the call site that created them) at context teardown.
+    """
+    # (kind, ref) -> Resource
+    _resources = {}
+    # code file name -> whether it is a module of the core package
+    _core_files = {}
+    # bytes passed to glBufferData/glBufferSubData/glTexImage since begin_frame()
+    _bytes_uploaded = 0
+    _bytes_uploaded_last_frame = 0
+
+    @staticmethod
+    def _call_site():
+        """ file:line of the first caller outside the core package, i.e. the application code """
+        frame = sys._getframe(1)
+        while frame is not None and ResourceRegistry._is_core_file(frame.f_code.co_filename):
+            frame = frame.f_back
+        if frame is None:
+            return "<unknown>"
+        return f"{frame.f_code.co_filename}:{frame.f_lineno}"
+
+    @staticmethod
+    def _is_core_file(file_name):
+        # Resolved paths, so relative, symlinked or differently normalised imports compare equal
+        if file_name not in ResourceRegistry._core_files:
+            ResourceRegistry._core_files[file_name] = os.path.dirname(os.path.realpath(file_name)) == _core_dir
+        return ResourceRegistry._core_files[file_name]
+
+    @staticmethod
+    def register(kind, ref, size=0):
+        ResourceRegistry._resources[(kind, int(ref))] = Resource(kind, int(ref), size, ResourceRegistry._call_site())
+        return ref
+
+    @staticmethod
+    def unregister(kind, ref):
+        ResourceRegistry._resources.pop((kind, int(ref)), None)
+
+    @staticmethod
+    def set_size(kind, ref, size):
+        """ Record the GPU storage size of an object, e.g. after glBufferData """
+        key = (kind, int(ref))
+        if key in ResourceRegistry._resources:
+            ResourceRegistry._resources[key] = ResourceRegistry._resources[key]._replace(size=size)
+
+    @staticmethod
+    def record_upload(size):
+        ResourceRegistry._bytes_uploaded += size
+
+    # Creation and deletion of the individual kinds of objects
+
+    @staticmethod
+    def create_buffer():
+        return ResourceRegistry.register("buffer", GL.glGenBuffers(1))
+
+    @staticmethod
+    def delete_buffer(ref):
+        GL.glDeleteBuffers(1, [ref])
+        ResourceRegistry.unregister("buffer", ref)
+        GLState.forget_buffer(ref)
+
+    @staticmethod
+    def create_vertex_array():
+        return ResourceRegistry.register("vertex_array", GL.glGenVertexArrays(1))
+
+    @staticmethod
+    def delete_vertex_array(ref):
+        GL.glDeleteVertexArrays(1, [ref])
+        ResourceRegistry.unregister("vertex_array", ref)
+        GLState.forget_vertex_array(ref)
+
+    @staticmethod
+    def create_shader(shader_type):
+        return ResourceRegistry.register("shader", GL.glCreateShader(shader_type))
+
+    @staticmethod
+    def delete_shader(ref):
+        GL.glDeleteShader(ref)
+        ResourceRegistry.unregister("shader", ref)
+
+    @staticmethod
+    def create_program():
+        return ResourceRegistry.register("program", GL.glCreateProgram())
+
+    @staticmethod
+    def delete_program(ref):
+        GL.glDeleteProgram(ref)
+        ResourceRegistry.unregister("program", ref)
+        GLState.forget_program(ref)
+
+    @staticmethod
+    def create_texture():
+        return ResourceRegistry.register("texture", GL.glGenTextures(1))
+
+    @staticmethod
+    def delete_texture(ref):
+        GL.glDeleteTextures(1, [ref])
+        ResourceRegistry.unregister("texture", ref)
+
+    @staticmethod
+    def create_framebuffer():
+        return ResourceRegistry.register("framebuffer", GL.glGenFramebuffers(1))
+
+    @staticmethod
+    def delete_framebuffer(ref):
+        GL.glDeleteFramebuffers(1, [ref])
+        ResourceRegistry.unregister("framebuffer", ref)
+
+    # Statistics
+
+    @staticmethod
+    def begin_frame():
+        """ Start counting uploads for a new frame """
+        ResourceRegistry._bytes_uploaded_last_frame = ResourceRegistry._bytes_uploaded
+        ResourceRegistry._bytes_uploaded = 0
+
+    @staticmethod
+    def bytes_uploaded():
+        """ Bytes uploaded since begin_frame() """
+        return ResourceRegistry._bytes_uploaded
+
+    @staticmethod
+    def bytes_uploaded_last_frame():
+        return ResourceRegistry._bytes_uploaded_last_frame
+
+    @staticmethod
+    def live_resources(kind=None):
+        return [resource for resource in ResourceRegistry._resources.values()
+                if kind is None or resource.kind == kind]
+
+    @staticmethod
+    def live_bytes():
+        """ GPU memory in bytes held by live objects, per kind """
+        totals = {}
+        for resource in ResourceRegistry._resources.values():
+            totals[resource.kind] = totals.get(resource.kind, 0) + resource.size
+        return totals
+
+    @staticmethod
+    def report_leaks(print_report=True):
+        """
+        Call at context teardown: every object still registered was never deleted.
+        Returns the leaked resources and prints them grouped by call site.
+        """
+        leaks = ResourceRegistry.live_resources()
+        if print_report and leaks:
+            by_site = {}
+            for resource in leaks:
+                by_site.setdefault((resource.kind, resource.call_site), []).append(resource)
+            lines = [f'{len(leaks)} GPU object(s) were not deleted:']
+            for (kind, call_site), resources in sorted(by_site.items()):
+                size = sum(resource.size for resource in resources)
+                lines.append(f'  {len(resources)} x {kind} ({size} bytes) created at {call_site}')
+            print('\n'.join(lines))
+        return leaks
+
+    @staticmethod
+    def clear():
+        """ Forget all objects, e.g. after the context that owned them was destroyed """
+        ResourceRegistry._resources = {}
+        ResourceRegistry._bytes_uploaded = 0
+        ResourceRegistry._bytes_uploaded_last_frame = 0
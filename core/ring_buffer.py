@@ -0,0 +1,127 @@
+import ctypes
+
+import OpenGL.GL as GL
+import numpy as np
+
+from core.gl_state import GLState
+from core.resources import ResourceRegistry
+
+
+class RingBuffer:
+    """
+    GPU buffer for data that changes every frame (animated joints, tool previews), split into
+    region_count regions that are used in turn. With glBufferStorage (OpenGL 4.4 or
+    ARB_buffer_storage) the buffer is persistently mapped: callers write straight into a numpy view
+    of GPU-visible memory and a fence per region keeps the CPU from overwriting data the GPU is still
+    reading. Without the extension, a CPU staging array is written instead and uploaded by flush():
+    the buffer is orphaned when the ring wraps around to the first region, and the following regions
+    are written into the rest of that fresh storage, which no queued draw reads.
+
+    Per frame:
+        view = ring.begin_frame(dtype=np.float32)   # wait until the next region is free
+        view[:n] = vertices                         # write data
+        ring.flush(nbytes)                          # upload (fallback path only)
+        ... draw, reading from byte offset ring.offset ...
+        ring.end_frame()                            # fence the region
+    """
+    # Time to wait for a fence before checking again, in nanoseconds
+    WAIT_TIMEOUT = 1_000_000
+
+    def __init__(self, region_size, region_count=3, target=GL.GL_ARRAY_BUFFER, persistent=None):
+        self._region_size = region_size
+        self._region_count = region_count
+        self._target = target
+        # None selects persistent mapping if the driver supports it
+        if persistent is None:
+            persistent = RingBuffer.is_persistent_mapping_supported()
+        self._persistent = persistent
+        # index of the region written in the current frame
+        self._region = region_count - 1
+        self._fences = [None] * region_count
+        total_size = region_size * region_count
+        self._buffer_ref = ResourceRegistry.create_buffer()
+        ResourceRegistry.set_size("buffer", self._buffer_ref, total_size)
+        GLState.bind_buffer(target, self._buffer_ref)
+        if persistent:
+            flags = GL.GL_MAP_WRITE_BIT | GL.GL_MAP_PERSISTENT_BIT | GL.GL_MAP_COHERENT_BIT
+            GL.glBufferStorage(target, total_size, None, flags)
+            pointer = GL.glMapBufferRange(target, 0, total_size, flags)
+            address = pointer if isinstance(pointer, int) else ctypes.cast(pointer, ctypes.c_void_p).value
+            # numpy view of the mapped GPU memory
+            self._memory = np.frombuffer((ctypes.c_ubyte * total_size).from_address(address), dtype=np.uint8)
+        else:
+            GL.glBufferData(target, total_size, None, GL.GL_STREAM_DRAW)
+            # CPU staging memory, uploaded by flush()
+            self._memory = np.zeros(total_size, dtype=np.uint8)
+
+    @staticmethod
+    def is_persistent_mapping_supported():
+        """ True if the current context provides glBufferStorage """
+        return bool(GL.glBufferStorage)
+
+    @property
+    def buffer_ref(self):
+        return self._buffer_ref
+
+    @property
+    def persistent(self):
+        return self._persistent
+
+    @property
+    def region_size(self):
+        return self._region_size
+
+    @property
+    def offset(self):
+        """ Byte offset of the current region inside the buffer """
+        return self._region * self._region_size
+
+    def begin_frame(self, dtype=np.uint8):
+        """ Advance to the next region, wait until the GPU is done with it and return a view for writing """
+        self._region = (self._region + 1) % self._region_count
+        fence = self._fences[self._region]
+        if fence is not None:
+            while True:
+                status = GL.glClientWaitSync(fence, GL.GL_SYNC_FLUSH_COMMANDS_BIT, RingBuffer.WAIT_TIMEOUT)
+                if status != GL.GL_TIMEOUT_EXPIRED:
+                    break
+            GL.glDeleteSync(fence)
+            self._fences[self._region] = None
+        return self.view(dtype)
+
+    def view(self, dtype=np.uint8):
+        """ Writable view of the current region, reinterpreted as dtype """
+        return self._memory[self.offset:self.offset + self._region_size].view(dtype)
+
+    def flush(self, nbytes=None):
+        """ Make the written bytes of the current region visible to the GPU """
+        if nbytes is None:
+            nbytes = self._region_size
+        # Counted as uploaded in both paths: the GPU reads the bytes from system memory either way
+        ResourceRegistry.record_upload(nbytes)
+        if self._persistent:
+            # Coherent mapping: writes are visible without further calls
+            return
+        GLState.bind_buffer(self._target, self._buffer_ref)
+        if self._region == 0:
+            # Wrapped around: orphan the whole buffer so the driver does not wait for draws still
+            # reading the previous storage; later regions go into parts of it no draw has used yet
+            GL.glBufferData(self._target, len(self._memory), None, GL.GL_STREAM_DRAW)
+        GL.glBufferSubData(self._target, self.offset, nbytes, self._memory[self.offset:self.offset + nbytes])
+
+    def end_frame(self):
+        """ Insert a fence after the draw calls that read the current region """
+        if self._persistent:
+            self._fences[self._region] = GL.glFenceSync(GL.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+
+    def delete(self):
+        """ Release the fences, the mapping and the GPU buffer """
+        for fence in self._fences:
+            if fence is not None:
+                GL.glDeleteSync(fence)
+        self._fences = [None] * self._region_count
+        if self._persistent:
+            GLState.bind_buffer(self._target, self._buffer_ref)
+            GL.glUnmapBuffer(self._target)
+        self._memory = None
+        ResourceRegistry.delete_buffer(self._buffer_ref)
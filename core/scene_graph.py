@@ -0,0 +1,160 @@
+import numpy as np
+
+from core.matrix import Matrix
+
+
+class Node:
+    """
+    Handle to one transform in a SceneGraph. The matrices themselves live in the
+    contiguous arrays of the graph; a node only stores its index.
+    """
+    def __init__(self, graph, index):
+        self._graph = graph
+        self._index = index
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def graph(self):
+        return self._graph
+
+    @property
+    def parent(self):
+        parent_index = self._graph.parent_indices[self._index]
+        return None if parent_index < 0 else Node(self._graph, int(parent_index))
+
+    @property
+    def local_matrix(self):
+        """ Read-only view of the local matrix; assign to local_matrix to change it """
+        view = self._graph.local_matrices[self._index]
+        view.flags.writeable = False
+        return view
+
+    @local_matrix.setter
+    def local_matrix(self, matrix):
+        self._graph.set_local_matrices(self._index, matrix)
+
+    @property
+    def world_matrix(self):
+        """ World matrix of the node, recomputed first if any transform in the graph changed """
+        self._graph.update()
+        return self._graph.world_matrices[self._index]
+
+    @property
+    def version(self):
+        """ Incremented every time the world matrix of the node is recomputed """
+        return int(self._graph.versions[self._index])
+
+    def add_child(self, local_matrix=None):
+        return self._graph.add_node(self, local_matrix)
+
+
+class SceneGraph:
+    """
+    Transform hierarchy whose local and world matrices are stored in contiguous
+    (capacity, 4, 4) float32 arrays. Changing a local matrix only flags the node as dirty;
+    update() then recomputes the world matrices of the dirty subtrees, one tree level
+    at a time with vectorized matrix products. A frame without motion does no matrix math.
+    """
+    def __init__(self, capacity=256):
+        self._count = 0
+        self._local = Matrix.make_identities(capacity)
+        self._world = Matrix.make_identities(capacity)
+        self._parent = np.full(capacity, -1, dtype=np.int32)
+        self._depth = np.zeros(capacity, dtype=np.int32)
+        self._dirty = np.zeros(capacity, dtype=bool)
+        self._version = np.zeros(capacity, dtype=np.uint64)
+        # Node indices grouped by depth; rebuilt lazily after nodes are added
+        self._levels = None
+        self._any_dirty = False
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def local_matrices(self):
+        return self._local[:self._count]
+
+    @property
+    def world_matrices(self):
+        """ Contiguous (N, 4, 4) view of all world matrices; call update() first """
+        return self._world[:self._count]
+
+    @property
+    def parent_indices(self):
+        return self._parent[:self._count]
+
+    @property
+    def versions(self):
+        return self._version[:self._count]
+
+    def node(self, index):
+        return Node(self, index)
+
+    def add_node(self, parent=None, local_matrix=None):
+        """ Add a node below parent (a Node, an index or None for a root) and return it """
+        if self._count == len(self._local):
+            self._grow(2 * len(self._local))
+        index = self._count
+        self._count += 1
+        parent_index = parent.index if isinstance(parent, Node) else (-1 if parent is None else parent)
+        self._parent[index] = parent_index
+        self._depth[index] = 0 if parent_index < 0 else self._depth[parent_index] + 1
+        if local_matrix is None:
+            Matrix.make_identity(out=self._local[index])
+        else:
+            self._local[index] = local_matrix
+        self._dirty[index] = True
+        self._any_dirty = True
+        self._levels = None
+        return Node(self, index)
+
+    def set_local_matrices(self, indices, matrices):
+        """ Replace the local matrices of one node or an array of nodes and flag them as dirty """
+        self._local[indices] = matrices
+        self._dirty[indices] = True
+        self._any_dirty = True
+
+    def update(self):
+        """ Recompute world matrices of dirty nodes and their descendants; returns how many changed """
+        if not self._any_dirty:
+            return 0
+        if self._levels is None:
+            self._build_levels()
+        dirty = self._dirty
+        for depth, level in enumerate(self._levels):
+            if depth > 0:
+                # A node is dirty if its parent's world matrix changed
+                dirty[level] |= dirty[self._parent[level]]
+            changed = level[dirty[level]]
+            if len(changed) == 0:
+                continue
+            if depth == 0:
+                self._world[changed] = self._local[changed]
+            else:
+                self._world[changed] = np.matmul(self._world[self._parent[changed]], self._local[changed])
+        changed_count = int(np.count_nonzero(dirty[:self._count]))
+        self._version[:self._count][dirty[:self._count]] += 1
+        dirty[:self._count] = False
+        self._any_dirty = False
+        return changed_count
+
+    def _build_levels(self):
+        depth = self._depth[:self._count]
+        order = np.argsort(depth, kind='stable')
+        boundaries = np.searchsorted(depth[order], np.arange(1, depth.max() + 1))
+        self._levels = np.split(order.astype(np.int32), boundaries)
+
+    def _grow(self, capacity):
+        count = self._count
+        local = Matrix.make_identities(capacity)
+        world = Matrix.make_identities(capacity)
+        local[:count] = self._local[:count]
+        world[:count] = self._world[:count]
+        self._local, self._world = local, world
+        self._parent = np.concatenate([self._parent[:count], np.full(capacity - count, -1, dtype=np.int32)])
+        self._depth = np.concatenate([self._depth[:count], np.zeros(capacity - count, dtype=np.int32)])
+        self._dirty = np.concatenate([self._dirty[:count], np.zeros(capacity - count, dtype=bool)])
+        self._version = np.concatenate([self._version[:count], np.zeros(capacity - count, dtype=np.uint64)])
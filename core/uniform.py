@@ -1,15 +1,90 @@
 import OpenGL.GL as GL
+import numpy as np
+
+from core.program import Program
+
+
+# Conversions of uniform data to the value sent by glUniform* and remembered per location
+_as_vector = tuple
+
+
+def _as_matrix(data):
+    # glUniformMatrix4fv sends float32 values; the bytes of this array are what the shadow compares
+    return np.asarray(data, dtype=np.float32)
 
 
 class Uniform:
+    # Upload statistics shared by all uniforms: glUniform calls made, and calls skipped
+    # because the program already held the value. Kept in a dict: assigning class attributes
+    # on every upload would invalidate Python's attribute caches for the whole class.
+    upload_counters = {"uploads": 0, "skipped": 0}
+
+    # Last value uploaded to each (program reference, uniform location); uniform values are
+    # program state, so all Uniform objects bound to the same variable share one entry.
+    # Values set with glUniform* directly, bypassing Uniform, are not seen here.
+    _shadow = {}
+
+    # Single value types: type -> (conversion of the data, glUniform* function). locate_variable
+    # builds one upload function per uniform from the entry, with the location bound into it.
+    VALUE_TYPES = {
+        "int": (int, GL.glUniform1i),
+        "bool": (int, GL.glUniform1i),
+        "float": (float, GL.glUniform1f),
+        "vec2": (_as_vector, GL.glUniform2f),
+        "vec3": (_as_vector, GL.glUniform3f),
+        "vec4": (_as_vector, GL.glUniform4f),
+        "mat4": (_as_matrix, GL.glUniformMatrix4fv),
+    }
+
+    # Name of the method that uploads each of the other types of data; the one matching the
+    # uniform's type is looked up once in locate_variable, so uploads do not compare type names
+    UPLOADERS = {
+        "sampler2D": "_upload_sampler2d",
+        "Light": "_upload_light",
+        "Shadow": "_upload_shadow",
+        "int[]": "_upload_array",
+        "float[]": "_upload_array",
+        "vec2[]": "_upload_array",
+        "vec3[]": "_upload_array",
+        "vec4[]": "_upload_array",
+        "mat4[]": "_upload_array",
+    }
+
+    # Array types: type -> (numpy type, shape of one element, uniform components per element,
+    #                       function called with (location, count, elements))
+    # The data is an array of elements, e.g. (N, 4, 4) for mat4[]; all of it goes out in one call.
+    # Components are counted as vec4 slots, the way most implementations store uniform arrays.
+    ARRAY_TYPES = {
+        "int[]": (np.int32, (), 4, GL.glUniform1iv),
+        "float[]": (np.float32, (), 4, GL.glUniform1fv),
+        "vec2[]": (np.float32, (2,), 4, GL.glUniform2fv),
+        "vec3[]": (np.float32, (3,), 4, GL.glUniform3fv),
+        "vec4[]": (np.float32, (4,), 4, GL.glUniform4fv),
+        "mat4[]": (np.float32, (4, 4), 16,
+                   lambda location, count, elements: GL.glUniformMatrix4fv(location, count, GL.GL_TRUE, elements)),
+    }
+
     def __init__(self, data_type, data):
         # type of data:
-        # int | bool | float | vec2 | vec3 | vec4
+        # int | bool | float | vec2 | vec3 | vec4 | mat4 | sampler2D | Light | Shadow
+        # or an array: int[] | float[] | vec2[] | vec3[] | vec4[] | mat4[]
+        if data_type not in Uniform.VALUE_TYPES and data_type not in Uniform.UPLOADERS:
+            raise Exception(f'Uniform has unknown type {data_type}')
         self._data_type = data_type
         # data to be sent to uniform variable
         self._data = data
         # reference for variable location in program
         self._variable_ref = None
+        # program the variable was located in
+        self._program_ref = None
+        # key of the variable's value in _shadow
+        self._shadow_key = None
+        # method that uploads the data, selected in locate_variable
+        self._uploader = self._upload_unlocated
+        # for array types: number of elements the located array variable holds,
+        # and the glUniform*v function that uploads them
+        self._array_length = None
+        self._array_function = None
 
     @property
     def data(self):
@@ -19,71 +94,219 @@ class Uniform:
     def data(self, data):
         self._data = data
 
+    @property
+    def array_length(self):
+        """ Elements uploaded per call for array types: the active length of the array variable """
+        return self._array_length
+
     def locate_variable(self, program_ref, variable_name):
-        """ Get and store reference for program variable with given name """
+        """ Get and store reference for program variable with given name, and select the uploader """
+        self._program_ref = program_ref
         if self._data_type == 'Light':
             self._variable_ref = {
-                "lightType":    GL.glGetUniformLocation(program_ref, variable_name + ".lightType"),
-                "color":        GL.glGetUniformLocation(program_ref, variable_name + ".color"),
-                "direction":    GL.glGetUniformLocation(program_ref, variable_name + ".direction"),
-                "position":     GL.glGetUniformLocation(program_ref, variable_name + ".position"),
-                "attenuation":  GL.glGetUniformLocation(program_ref, variable_name + ".attenuation"),
+                field: Uniform.get_location(program_ref, variable_name + "." + field)
+                for field in ("lightType", "color", "direction", "position", "attenuation")
             }
         elif self._data_type == "Shadow":
             self._variable_ref = {
-                "lightDirection": GL.glGetUniformLocation(program_ref, variable_name + ".lightDirection"),
-                "projectionMatrix": GL.glGetUniformLocation(program_ref, variable_name + ".projectionMatrix"),
-                "viewMatrix": GL.glGetUniformLocation(program_ref, variable_name + ".viewMatrix"),
-                "depthTextureSampler": GL.glGetUniformLocation(program_ref, variable_name + ".depthTextureSampler"),
-                "strength": GL.glGetUniformLocation(program_ref, variable_name + ".strength"),
-                "bias": GL.glGetUniformLocation(program_ref, variable_name + ".bias"),
+                field: Uniform.get_location(program_ref, variable_name + "." + field)
+                for field in ("lightDirection", "projectionMatrix", "viewMatrix", "depthTextureSampler",
+                              "strength", "bias")
             }
         else:
-            self._variable_ref = GL.glGetUniformLocation(program_ref, variable_name)
+            self._variable_ref = Uniform.get_location(program_ref, variable_name)
+            if self._data_type in Uniform.ARRAY_TYPES and self._variable_ref != -1:
+                self._array_length = Uniform._get_array_length(program_ref, variable_name, self._data_type)
+                self._array_function = Uniform.ARRAY_TYPES[self._data_type][3]
+        self._shadow_key = (program_ref, self._variable_ref) if self._variable_ref != -1 else None
+        # If the program does not reference the variable, uploads do nothing
+        if self._variable_ref == -1:
+            self._uploader = self._upload_nothing
+        elif self._data_type in Uniform.VALUE_TYPES:
+            self._uploader = self._make_value_uploader()
+        else:
+            self._uploader = getattr(self, Uniform.UPLOADERS[self._data_type])
+
+    @staticmethod
+    def get_location(program_ref, variable_name):
+        """ Location of a uniform; a dictionary hit for a Program, a driver query for a plain reference """
+        if isinstance(program_ref, Program):
+            return program_ref.get_uniform_location(variable_name)
+        return GL.glGetUniformLocation(program_ref, variable_name)
+
+    @staticmethod
+    def _get_array_length(program_ref, variable_name, data_type):
+        """
+        Active length of an array variable, limited to what fits in GL_MAX_VERTEX_UNIFORM_COMPONENTS.
+        A Program knows it; otherwise, since element k has a location exactly when k is below the
+        active length, search for the end.
+        """
+        limit = GL.glGetIntegerv(GL.GL_MAX_VERTEX_UNIFORM_COMPONENTS) // Uniform.ARRAY_TYPES[data_type][2]
+        if isinstance(program_ref, Program):
+            return min(program_ref.get_array_length(variable_name), limit)
+        if variable_name.endswith("[0]"):
+            variable_name = variable_name[:-3]
+        # Invariant: element low exists, element high does not
+        low, high = 0, limit
+        if GL.glGetUniformLocation(program_ref, f"{variable_name}[{limit - 1}]") != -1:
+            return limit
+        while high - low > 1:
+            middle = (low + high) // 2
+            if GL.glGetUniformLocation(program_ref, f"{variable_name}[{middle}]") != -1:
+                low = middle
+            else:
+                high = middle
+        return high
+
+    @staticmethod
+    def reset_upload_counters():
+        Uniform.upload_counters["uploads"] = 0
+        Uniform.upload_counters["skipped"] = 0
+
+    @staticmethod
+    def forget_program(program_ref):
+        """ Drop the shadow values of a deleted or relinked program, whose uniforms start over at defaults """
+        for key in [key for key in Uniform._shadow if key[0] == program_ref]:
+            del Uniform._shadow[key]
+
+    @staticmethod
+    def _upload_if_changed(key, value, upload_function, *args):
+        """ Call upload_function(location, *args) unless value is what the program already holds """
+        if Uniform._shadow.get(key) == value:
+            Uniform.upload_counters["skipped"] += 1
+            return
+        upload_function(key[1], *args)
+        Uniform._shadow[key] = value
+        Uniform.upload_counters["uploads"] += 1
 
     def upload_data(self):
-        """ Store data in uniform variable previously located """
-        # If the program does not reference the variable, then exit
-        if self._variable_ref != -1:
-            if self._data_type == 'int':
-                GL.glUniform1i(self._variable_ref, self._data)
-            elif self._data_type == 'bool':
-                GL.glUniform1i(self._variable_ref, self._data)
-            elif self._data_type == 'float':
-
-                # print(self._variable_ref)
-                GL.glUniform1f(self._variable_ref, self._data)
-            elif self._data_type == 'vec2':
-                GL.glUniform2f(self._variable_ref, *self._data)
-            elif self._data_type == 'vec3':
-                GL.glUniform3f(self._variable_ref, *self._data)
-            elif self._data_type == 'vec4':
-                GL.glUniform4f(self._variable_ref, *self._data)
-            elif self._data_type == 'mat4':
-                GL.glUniformMatrix4fv(self._variable_ref, 1, GL.GL_TRUE, self._data)
-            elif self._data_type == "sampler2D":
-                texture_object_ref, texture_unit_ref = self._data
-                # Activate texture unit
-                GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit_ref)
-                # Associate texture object reference to currently active texture unit
-                GL.glBindTexture(GL.GL_TEXTURE_2D, texture_object_ref)
-                # Upload texture unit number (0...15) to uniform variable in shader
-                GL.glUniform1i(self._variable_ref, texture_unit_ref)
-            elif self._data_type == "Light":
-                GL.glUniform1i(self._variable_ref["lightType"], self._data.light_type)
-                GL.glUniform3f(self._variable_ref["color"], *self._data.color)
-                GL.glUniform3f(self._variable_ref["direction"], *self._data.direction)
-                GL.glUniform3f(self._variable_ref["position"], *self._data.local_position)
-                GL.glUniform3f(self._variable_ref["attenuation"], *self._data.attenuation)
-            elif self._data_type == "Shadow":
-                GL.glUniform3f(self._variable_ref["lightDirection"], *self._data.light_source.direction)
-                GL.glUniformMatrix4fv(self._variable_ref["projectionMatrix"], 1, GL.GL_TRUE, self._data.camera.projection_matrix)
-                GL.glUniformMatrix4fv(self._variable_ref["viewMatrix"], 1, GL.GL_TRUE, self._data.camera.view_matrix)
-                # Configure depth texture
-                texture_object_ref = self._data.render_target.texture.texture_ref
-                texture_unit_ref = 3
-                GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit_ref)
-                GL.glBindTexture(GL.GL_TEXTURE_2D, texture_object_ref)
-                GL.glUniform1i(self._variable_ref["depthTextureSampler"], texture_unit_ref)
-                GL.glUniform1f(self._variable_ref["strength"], self._data.strength)
-                GL.glUniform1f(self._variable_ref["bias"], self._data.bias)
+        """
+        Store data in uniform variable previously located.
+        Values equal to the last ones uploaded to the same program location are not sent again.
+        """
+        self._uploader()
+
+    # Uploaders, one per type of data
+
+    def _upload_unlocated(self):
+        raise Exception('Uniform must be located with locate_variable before uploading')
+
+    def _upload_nothing(self):
+        pass
+
+    def _make_value_uploader(self):
+        """
+        Upload function of a single value type, with the location, shadow entry and glUniform*
+        function bound in, so an upload is one call doing the comparison and the GL call inline
+        """
+        convert, upload_function = Uniform.VALUE_TYPES[self._data_type]
+        uniform, location, key = self, self._variable_ref, self._shadow_key
+        shadow, counters = Uniform._shadow, Uniform.upload_counters
+        if convert is _as_matrix:
+            def upload_matrix():
+                # _as_matrix inlined: this is the per-frame path of every matrix uniform
+                matrix = np.asarray(uniform._data, dtype=np.float32)
+                value = matrix.tobytes()
+                if shadow.get(key) == value:
+                    counters["skipped"] += 1
+                    return
+                upload_function(location, 1, GL.GL_TRUE, matrix)
+                shadow[key] = value
+                counters["uploads"] += 1
+            return upload_matrix
+        if convert is _as_vector:
+            def upload_vector():
+                value = convert(uniform._data)
+                if shadow.get(key) == value:
+                    counters["skipped"] += 1
+                    return
+                upload_function(location, *value)
+                shadow[key] = value
+                counters["uploads"] += 1
+            return upload_vector
+
+        def upload_scalar():
+            value = convert(uniform._data)
+            if shadow.get(key) == value:
+                counters["skipped"] += 1
+                return
+            upload_function(location, value)
+            shadow[key] = value
+            counters["uploads"] += 1
+        return upload_scalar
+
+    def _array_elements(self):
+        """ Data of an array type as a contiguous array of elements; no copy if it already is one """
+        component_type, element_shape, _, _ = Uniform.ARRAY_TYPES[self._data_type]
+        return np.ascontiguousarray(self._data, dtype=component_type).reshape((-1,) + element_shape)
+
+    def _upload_array(self):
+        elements = self._array_elements()
+        if len(elements) > self._array_length:
+            raise Exception(f'Uniform has {len(elements)} elements but the array variable holds '
+                            f'{self._array_length}; upload them with upload_chunks()')
+        Uniform._upload_if_changed(self._shadow_key, elements.tobytes(), self._array_function, len(elements), elements)
+
+    def upload_chunks(self):
+        """
+        For array types with more elements than the variable holds: upload them array_length at a time.
+        Yields (first, count) after each upload, so the caller draws that chunk, e.g. count instances
+        that read their element with gl_InstanceID, before the next chunk overwrites the array.
+        """
+        if self._data_type not in Uniform.ARRAY_TYPES:
+            raise Exception(f'Uniform of type {self._data_type} is not an array')
+        if self._variable_ref is None:
+            self._upload_unlocated()
+        elements = self._array_elements()
+        if self._variable_ref == -1:
+            return
+        for first in range(0, len(elements), self._array_length):
+            chunk = elements[first:first + self._array_length]
+            self._array_function(self._variable_ref, len(chunk), chunk)
+            # The program now holds this chunk; keep the shadow in step for upload_data
+            Uniform._shadow[self._shadow_key] = chunk.tobytes()
+            Uniform.upload_counters["uploads"] += 1
+            yield first, len(chunk)
+
+    def _upload_sampler2d(self):
+        texture_object_ref, texture_unit_ref = self._data
+        # Activate texture unit
+        GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit_ref)
+        # Associate texture object reference to currently active texture unit
+        # (texture bindings are not program state, so this is always done)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture_object_ref)
+        # Upload texture unit number (0...15) to uniform variable in shader
+        Uniform._upload_if_changed(self._shadow_key, texture_unit_ref, GL.glUniform1i, texture_unit_ref)
+
+    def _upload_light(self):
+        program_ref = self._program_ref
+        light_type = int(self._data.light_type)
+        Uniform._upload_if_changed((program_ref, self._variable_ref["lightType"]), light_type,
+                                   GL.glUniform1i, light_type)
+        for field, value in (("color", self._data.color),
+                             ("direction", self._data.direction),
+                             ("position", self._data.local_position),
+                             ("attenuation", self._data.attenuation)):
+            value = _as_vector(value)
+            Uniform._upload_if_changed((program_ref, self._variable_ref[field]), value, GL.glUniform3f, *value)
+
+    def _upload_shadow(self):
+        program_ref = self._program_ref
+        direction = _as_vector(self._data.light_source.direction)
+        Uniform._upload_if_changed((program_ref, self._variable_ref["lightDirection"]), direction,
+                                   GL.glUniform3f, *direction)
+        for field, matrix in (("projectionMatrix", self._data.camera.projection_matrix),
+                              ("viewMatrix", self._data.camera.view_matrix)):
+            matrix = _as_matrix(matrix)
+            Uniform._upload_if_changed((program_ref, self._variable_ref[field]), matrix.tobytes(),
+                                       GL.glUniformMatrix4fv, 1, GL.GL_TRUE, matrix)
+        # Configure depth texture
+        texture_object_ref = self._data.render_target.texture.texture_ref
+        texture_unit_ref = 3
+        GL.glActiveTexture(GL.GL_TEXTURE0 + texture_unit_ref)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture_object_ref)
+        Uniform._upload_if_changed((program_ref, self._variable_ref["depthTextureSampler"]), texture_unit_ref,
+                                   GL.glUniform1i, texture_unit_ref)
+        for field in ("strength", "bias"):
+            value = float(getattr(self._data, field))
+            Uniform._upload_if_changed((program_ref, self._variable_ref[field]), value, GL.glUniform1f, value)
@@ -0,0 +1,269 @@
+import OpenGL.GL as GL
+import numpy as np
+
+from core.gl_state import GLState
+from core.program import Program
+from core.resources import ResourceRegistry
+
+
+class Std140Layout:
+    """
+    Memory layout of a uniform block (or of a struct inside one) following the std140 rules,
+    as a numpy structured dtype with explicit offsets. Fields are (name, type) or
+    (name, type, array_length) where type is a name from TYPES or another Std140Layout (a struct).
+
+    Matrices are written transposed (column by column), so the shader declares them as plain mat4
+    and sees the same matrix that Uniform uploads with glUniformMatrix4fv(..., GL_TRUE, ...).
+    """
+    # type of shader variable -> (numpy type of one component, number of components, base alignment, size)
+    TYPES = {
+        "int": (np.int32, 1, 4, 4),
+        "bool": (np.int32, 1, 4, 4),
+        "float": (np.float32, 1, 4, 4),
+        "vec2": (np.float32, 2, 8, 8),
+        "vec3": (np.float32, 3, 16, 12),
+        "vec4": (np.float32, 4, 16, 16),
+        "ivec2": (np.int32, 2, 8, 8),
+        "ivec3": (np.int32, 3, 16, 12),
+        "ivec4": (np.int32, 4, 16, 16),
+        "mat4": (np.float32, 16, 16, 64),
+    }
+
+    def __init__(self, fields):
+        # name -> (type, array length or None)
+        self._fields = {}
+        names, formats, offsets = [], [], []
+        offset = 0
+        for field in fields:
+            variable_name, data_type = field[0], field[1]
+            array_length = field[2] if len(field) > 2 else None
+            if isinstance(data_type, Std140Layout):
+                # Structs (and arrays of them) are aligned to and padded to a multiple of a vec4
+                alignment = 16
+                element_dtype, element_size = data_type.dtype, data_type.size
+            elif data_type in Std140Layout.TYPES:
+                component_type, component_count, alignment, element_size = Std140Layout.TYPES[data_type]
+                if data_type == "mat4":
+                    element_dtype = np.dtype((component_type, (4, 4)))
+                elif component_count > 1:
+                    element_dtype = np.dtype((component_type, (component_count,)))
+                else:
+                    element_dtype = np.dtype(component_type)
+            else:
+                raise Exception(f'Uniform block field {variable_name} has unknown type {data_type}')
+            if array_length is not None:
+                # Array elements are aligned and padded like a vec4
+                alignment = Std140Layout._round_up(alignment, 16)
+                stride = Std140Layout._round_up(element_size, 16)
+                if not isinstance(data_type, Std140Layout) and data_type != "mat4":
+                    # stored as (array_length, stride in components) so the padding is addressable
+                    component_type = Std140Layout.TYPES[data_type][0]
+                    element_dtype = np.dtype((component_type, (stride // 4,)))
+                field_dtype = np.dtype((element_dtype, (array_length,)))
+                field_size = stride * array_length
+            else:
+                field_dtype, field_size = element_dtype, element_size
+            offset = Std140Layout._round_up(offset, alignment)
+            names.append(variable_name)
+            formats.append(field_dtype)
+            offsets.append(offset)
+            self._fields[variable_name] = (data_type, array_length)
+            offset += field_size
+        self._dtype = np.dtype({'names': names, 'formats': formats, 'offsets': offsets,
+                                'itemsize': Std140Layout._round_up(offset, 16)})
+
+    @staticmethod
+    def _round_up(value, alignment):
+        return (value + alignment - 1) // alignment * alignment
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def size(self):
+        """ Size of the block in bytes, padded to a multiple of 16 """
+        return self._dtype.itemsize
+
+    @property
+    def field_names(self):
+        return list(self._fields)
+
+    def offset(self, variable_name):
+        """ Byte offset of a field inside the block """
+        return self._dtype.fields[variable_name][1]
+
+    def field_size(self, variable_name):
+        return self._dtype.fields[variable_name][0].itemsize
+
+    def write(self, record, variable_name, value, index=None):
+        """
+        Store value in a field of record (a 0-d array of this layout's dtype), or in element index
+        of an array field. Struct values are dicts of field values; arrays take a sequence of elements.
+        """
+        data_type, array_length = self._fields[variable_name]
+        target = record[variable_name]
+        if index is not None:
+            target = target[index:index + 1].reshape(target.shape[1:])
+        elif array_length is not None and not isinstance(data_type, Std140Layout):
+            # Whole array of plain values: write into the unpadded part of every element
+            if data_type == "mat4":
+                target[...] = np.swapaxes(np.asarray(value, dtype=np.float32), -1, -2)
+            else:
+                component_count = Std140Layout.TYPES[data_type][1]
+                target[:, :component_count] = np.asarray(value).reshape(array_length, component_count)
+            return
+        elif array_length is not None:
+            for element_index, element in enumerate(value):
+                self.write(record, variable_name, element, element_index)
+            return
+        if isinstance(data_type, Std140Layout):
+            for member_name, member_value in value.items():
+                data_type.write(target, member_name, member_value)
+        elif data_type == "mat4":
+            target[...] = np.asarray(value, dtype=np.float32).T
+        elif target.ndim == 1 and array_length is not None:
+            component_count = Std140Layout.TYPES[data_type][1]
+            target[:component_count] = value
+        else:
+            target[...] = value
+
+
+class UniformBuffer:
+    """
+    Uniform buffer object (UBO) holding one uniform block, for example the lights of a scene.
+    Values are packed with a Std140Layout into a CPU copy, and upload() sends the changed byte range
+    once per frame. The buffer is attached to a binding point that is assigned per block name and
+    shared by all programs, so every program that declares the block reads the same data:
+
+        layout (std140) uniform Lights { Light light[4]; int lightCount; };
+    """
+    # block name -> binding point, shared by all programs
+    _binding_points = {}
+
+    # Layouts matching the Light and Shadow structs that Uniform uploads member by member.
+    # The shadow's depth texture sampler cannot be part of a uniform block and stays a plain uniform.
+    LIGHT_LAYOUT = Std140Layout([
+        ("lightType", "int"),
+        ("color", "vec3"),
+        ("direction", "vec3"),
+        ("position", "vec3"),
+        ("attenuation", "vec3"),
+    ])
+    SHADOW_LAYOUT = Std140Layout([
+        ("lightDirection", "vec3"),
+        ("projectionMatrix", "mat4"),
+        ("viewMatrix", "mat4"),
+        ("strength", "float"),
+        ("bias", "float"),
+    ])
+
+    def __init__(self, block_name, layout, usage=GL.GL_DYNAMIC_DRAW):
+        self._block_name = block_name
+        self._layout = layout
+        self._binding_point = UniformBuffer.get_binding_point(block_name)
+        # CPU copy of the block
+        self._data = np.zeros((), dtype=layout.dtype)
+        # Byte range [dirty_start, dirty_stop) changed since the last upload
+        self._dirty_start = 0
+        self._dirty_stop = layout.size
+        # reference of available buffer from GPU
+        self._buffer_ref = ResourceRegistry.create_buffer()
+        GLState.bind_buffer(GL.GL_UNIFORM_BUFFER, self._buffer_ref)
+        GL.glBufferData(GL.GL_UNIFORM_BUFFER, layout.size, None, usage)
+        ResourceRegistry.set_size("buffer", self._buffer_ref, layout.size)
+        self.bind()
+
+    @property
+    def block_name(self):
+        return self._block_name
+
+    @property
+    def layout(self):
+        return self._layout
+
+    @property
+    def binding_point(self):
+        return self._binding_point
+
+    @property
+    def buffer_ref(self):
+        return self._buffer_ref
+
+    @property
+    def data(self):
+        """ CPU copy of the block; call mark_dirty() after writing to it directly """
+        return self._data
+
+    @staticmethod
+    def get_binding_point(block_name):
+        """ Binding point of a block name, assigned on first use """
+        if block_name not in UniformBuffer._binding_points:
+            UniformBuffer._binding_points[block_name] = len(UniformBuffer._binding_points)
+        return UniformBuffer._binding_points[block_name]
+
+    @staticmethod
+    def bind_program(program_ref, block_name):
+        """ Connect the block of a program to the shared binding point; returns False if the program has no such block """
+        if isinstance(program_ref, Program):
+            block_index = program_ref.get_uniform_block_index(block_name)
+        else:
+            block_index = GL.glGetUniformBlockIndex(program_ref, block_name)
+        if block_index == GL.GL_INVALID_INDEX:
+            return False
+        GL.glUniformBlockBinding(program_ref, block_index, UniformBuffer.get_binding_point(block_name))
+        return True
+
+    @staticmethod
+    def light_values(light):
+        """ Field values of a Light struct, from the same light object Uniform("Light", ...) takes """
+        return {
+            "lightType": light.light_type,
+            "color": light.color,
+            "direction": light.direction,
+            "position": light.local_position,
+            "attenuation": light.attenuation,
+        }
+
+    @staticmethod
+    def shadow_values(shadow):
+        """ Field values of a Shadow struct, from the same shadow object Uniform("Shadow", ...) takes """
+        return {
+            "lightDirection": shadow.light_source.direction,
+            "projectionMatrix": shadow.camera.projection_matrix,
+            "viewMatrix": shadow.camera.view_matrix,
+            "strength": shadow.strength,
+            "bias": shadow.bias,
+        }
+
+    def set(self, variable_name, value, index=None):
+        """ Store value in a field of the block (element index of an array field) """
+        self._layout.write(self._data, variable_name, value, index)
+        offset = self._layout.offset(variable_name)
+        self.mark_dirty(offset, offset + self._layout.field_size(variable_name))
+
+    def mark_dirty(self, start=0, stop=None):
+        """ Flag the byte range [start, stop) for the next upload; everything by default """
+        if stop is None:
+            stop = self._layout.size
+        self._dirty_start = min(self._dirty_start, start)
+        self._dirty_stop = max(self._dirty_stop, stop)
+
+    def upload(self):
+        """ Send the changed range to the GPU; returns the number of bytes sent """
+        if self._dirty_start >= self._dirty_stop:
+            return 0
+        data = self._data.reshape(1).view(np.uint8)[self._dirty_start:self._dirty_stop]
+        GLState.bind_buffer(GL.GL_UNIFORM_BUFFER, self._buffer_ref)
+        GL.glBufferSubData(GL.GL_UNIFORM_BUFFER, self._dirty_start, data.nbytes, data)
+        ResourceRegistry.record_upload(data.nbytes)
+        self._dirty_start = self._layout.size
+        self._dirty_stop = 0
+        return data.nbytes
+
+    def bind(self):
+        """ Attach the buffer to the block's binding point """
+        GLState.bind_buffer_base(GL.GL_UNIFORM_BUFFER, self._binding_point, self._buffer_ref)
+
+    def delete(self):
+        ResourceRegistry.delete_buffer(self._buffer_ref)
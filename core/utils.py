@@ -3,6 +3,10 @@ import PyQt5.QtOpenGL as qgl
 from platform import system, machine
 from collections import namedtuple
 
+from core.program import Program
+from core.resources import ResourceRegistry
+from core.uniform import Uniform
+
 
 class Utils:
     """
@@ -39,7 +43,7 @@ class Utils:
         else:
             shader_code = '#version 430 core\n' + shader_code
         # Create empty shader object and return reference value
-        shader_ref = GL.glCreateShader(shader_type)
+        shader_ref = ResourceRegistry.create_shader(shader_type)
         # Stores the source code in the shader
         GL.glShaderSource(shader_ref, shader_code)
         # Compiles source code previously stored in the shader object
@@ -50,7 +54,7 @@ class Utils:
             # Retrieve error message
             error_message = GL.glGetShaderInfoLog(shader_ref)
             # free memory used to store shader program
-            GL.glDeleteShader(shader_ref)
+            ResourceRegistry.delete_shader(shader_ref)
             # Convert byte string to character string
             error_message = '\n' + error_message.decode('utf-8')
             # Raise exception: halt program and print error message
@@ -63,7 +67,7 @@ class Utils:
         vertex_shader_ref = Utils.initialize_shader(vertex_shader_code, GL.GL_VERTEX_SHADER)
         fragment_shader_ref = Utils.initialize_shader(fragment_shader_code, GL.GL_FRAGMENT_SHADER)
         # Create empty program object and store reference to it
-        program_ref = GL.glCreateProgram()
+        program_ref = ResourceRegistry.create_program()
         # Attach previously compiled shader programs
         GL.glAttachShader(program_ref, vertex_shader_ref)
         GL.glAttachShader(program_ref, fragment_shader_ref)
@@ -71,17 +75,28 @@ class Utils:
         GL.glLinkProgram(program_ref)
         # queries whether program link was successful
         link_success = GL.glGetProgramiv(program_ref, GL.GL_LINK_STATUS)
+        # The linked program keeps its own copy of the code; free the shader objects
+        for shader_ref in (vertex_shader_ref, fragment_shader_ref):
+            GL.glDetachShader(program_ref, shader_ref)
+            ResourceRegistry.delete_shader(shader_ref)
         if not link_success:
             # Retrieve error message
             error_message = GL.glGetProgramInfoLog(program_ref)
             # free memory used to store program
-            GL.glDeleteProgram(program_ref)
+            ResourceRegistry.delete_program(program_ref)
             # Convert byte string to character string
             error_message = '\n' + error_message.decode('utf-8')
             # Raise exception: halt application and print error message
             raise Exception(error_message)
-        # Linking was successful; return program reference value
-        return program_ref
+        # Linking was successful; return the program reference value as a Program,
+        # which has looked up all active variables once
+        return Program(program_ref)
+
+    @staticmethod
+    def delete_program(program_ref):
+        ResourceRegistry.delete_program(program_ref)
+        # The reference may be reused by a new program; drop what was cached for this one
+        Uniform.forget_program(program_ref)
 
     @staticmethod
     def is_macos_intel():
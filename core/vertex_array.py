@@ -0,0 +1,70 @@
+import OpenGL.GL as GL
+
+from core.attribute import Attribute
+from core.gl_state import GLState
+from core.index_buffer import IndexBuffer
+from core.resources import ResourceRegistry
+
+
+class VertexArray:
+    """
+    Vertex array object (VAO) for one program: records the buffer bindings, attribute pointers
+    and index buffer of a mesh once, so drawing the mesh only needs a single glBindVertexArray.
+    Attribute locations come from the Program, which enumerated them when it was linked.
+    """
+    def __init__(self, program_ref):
+        self._program_ref = program_ref
+        # reference of vertex array object from GPU
+        self._vao_ref = ResourceRegistry.create_vertex_array()
+        # variable name -> attribute (or vertex layout) bound to it
+        self._attributes = {}
+        # IndexBuffer or reference of the element buffer
+        self._index_buffer = None
+
+    @property
+    def vao_ref(self):
+        return self._vao_ref
+
+    @property
+    def program_ref(self):
+        return self._program_ref
+
+    @property
+    def attributes(self):
+        return self._attributes
+
+    @property
+    def index_buffer(self):
+        return self._index_buffer
+
+    def add_attribute(self, variable_name, attribute):
+        """ Record the binding of an Attribute buffer to a variable of the program """
+        GLState.bind_vertex_array(self._vao_ref)
+        variable_ref = Attribute.get_location(self._program_ref, variable_name)
+        attribute.associate_variable(self._program_ref, variable_name, variable_ref)
+        self._attributes[variable_name] = attribute
+
+    def add_vertex_layout(self, vertex_layout, buffer_ref):
+        """ Record the bindings of all variables of an interleaved buffer described by a VertexLayout """
+        GLState.bind_vertex_array(self._vao_ref)
+        vertex_layout.associate_variables(self._program_ref, buffer_ref)
+        for variable_name in vertex_layout.dtype.names:
+            self._attributes[variable_name] = vertex_layout
+
+    def set_index_buffer(self, index_buffer):
+        """
+        Record the index buffer (an IndexBuffer or a buffer reference);
+        the element array binding is part of the VAO state
+        """
+        GLState.bind_vertex_array(self._vao_ref)
+        if isinstance(index_buffer, IndexBuffer):
+            index_buffer.bind()
+        else:
+            GLState.bind_buffer(GL.GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+        self._index_buffer = index_buffer
+
+    def bind(self):
+        GLState.bind_vertex_array(self._vao_ref)
+
+    def delete(self):
+        ResourceRegistry.delete_vertex_array(self._vao_ref)
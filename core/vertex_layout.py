@@ -0,0 +1,102 @@
+from ctypes import c_void_p as buffer_offset
+
+import OpenGL.GL as GL
+import numpy as np
+
+from core.attribute import Attribute
+from core.gl_state import GLState
+from core.resources import ResourceRegistry
+
+
+class VertexLayout:
+    """
+    Describes interleaved vertex data as a numpy structured dtype: one record per vertex,
+    one field per shader attribute. Stride and offsets follow from the dtype, the separate
+    arrays are packed into a single buffer in one step, and every glVertexAttribPointer call
+    is set up with the correct stride and offset.
+    """
+    # type of shader variable -> (numpy type of one component, number of components)
+    TYPES = {
+        "float": (np.float32, 1),
+        "vec2": (np.float32, 2),
+        "vec3": (np.float32, 3),
+        "vec4": (np.float32, 4),
+        "int": (np.int32, 1),
+        "ivec2": (np.int32, 2),
+        "ivec3": (np.int32, 3),
+        "ivec4": (np.int32, 4),
+    }
+
+    def __init__(self, attributes):
+        # list of (variable name, data type) pairs, in the order they are stored per vertex
+        self._attributes = list(attributes)
+        fields = []
+        for variable_name, data_type in self._attributes:
+            if data_type not in VertexLayout.TYPES:
+                raise Exception(f'Attribute {variable_name} has unknown type {data_type}')
+            component_type, component_count = VertexLayout.TYPES[data_type]
+            shape = (component_count,) if component_count > 1 else ()
+            fields.append((variable_name, component_type, shape))
+        self._dtype = np.dtype(fields)
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def stride(self):
+        """ Size of one vertex in bytes """
+        return self._dtype.itemsize
+
+    def offset(self, variable_name):
+        """ Byte offset of an attribute inside one vertex """
+        return self._dtype.fields[variable_name][1]
+
+    def pack(self, **arrays):
+        """ Interleave separate per-attribute arrays, e.g. pack(vPosition=positions, vColor=colors) """
+        count = len(arrays[self._attributes[0][0]])
+        vertices = np.empty(count, dtype=self._dtype)
+        for variable_name, data_type in self._attributes:
+            vertices[variable_name] = np.asarray(arrays[variable_name]).reshape(vertices[variable_name].shape)
+        return vertices
+
+    def from_interleaved(self, data):
+        """ View a flat list/array of already interleaved float values as vertex records """
+        if any(VertexLayout.TYPES[data_type][0] != np.float32 for _, data_type in self._attributes):
+            raise Exception('from_interleaved only supports layouts made of float attributes')
+        return np.ascontiguousarray(data, dtype=np.float32).reshape(-1).view(self._dtype)
+
+    def upload_data(self, vertices, buffer_ref=None, usage=GL.GL_STATIC_DRAW):
+        """ Store packed vertices in a (new) GPU buffer and return its reference """
+        if buffer_ref is None:
+            buffer_ref = ResourceRegistry.create_buffer()
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, buffer_ref)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, vertices.nbytes, vertices, usage)
+        ResourceRegistry.set_size("buffer", buffer_ref, vertices.nbytes)
+        ResourceRegistry.record_upload(vertices.nbytes)
+        return buffer_ref
+
+    def associate_variables(self, program_ref, buffer_ref, locations=None):
+        """
+        Point every attribute variable in the program at its field of the interleaved buffer.
+        locations optionally maps variable names to already known attribute locations.
+        """
+        # Select buffer used by the following functions; one bind serves all attributes
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, buffer_ref)
+        for variable_name, data_type in self._attributes:
+            if locations is not None and variable_name in locations:
+                variable_ref = locations[variable_name]
+            else:
+                variable_ref = Attribute.get_location(program_ref, variable_name)
+            # If the program does not reference the variable, skip it
+            if variable_ref == -1:
+                continue
+            component_type, component_count = VertexLayout.TYPES[data_type]
+            offset = buffer_offset(self.offset(variable_name))
+            if component_type == np.int32:
+                # Integer attributes must use the I variant, or the values arrive converted to float
+                GL.glVertexAttribIPointer(variable_ref, component_count, GL.GL_INT, self.stride, offset)
+            else:
+                GL.glVertexAttribPointer(variable_ref, component_count, GL.GL_FLOAT, False, self.stride, offset)
+            # Indicate that data will be streamed to this variable
+            GL.glEnableVertexAttribArray(variable_ref)
@@ -20,6 +20,7 @@ if package_dir not in sys.path:
     sys.path.insert(0, package_dir)
 
 from core.utils import Utils
+from core.gl_state import GLState
 from core.attribute import Attribute
 
 class GLWidget(qgl.QGLWidget):
@@ -63,7 +64,7 @@ class GLWidget(qgl.QGLWidget):
         GL.glLineWidth(1)
         # Set up vertex array object #
         vao_ref = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(vao_ref)
+        GLState.bind_vertex_array(vao_ref)
         # Set up vertex attribute #
         position_data = [[ 0.8,  0.0,  0.0],
                          [ 0.4,  0.6,  0.0],
@@ -81,7 +82,7 @@ class GLWidget(qgl.QGLWidget):
 
         # upload _data to GPU
         # Select buffer used by the following functions
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.buffer_ref)
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, self.buffer_ref)
         # Store data in currently bound buffer
         # We multiply the 18 numbers by 32 since each is float32 to get the total bits
         # then divide by 8 since 1 byte = 8 bits
@@ -99,7 +100,7 @@ class GLWidget(qgl.QGLWidget):
 
     def paintGL(self):
         self.clear()
-        GL.glUseProgram(self.program_ref)
+        GLState.use_program(self.program_ref)
         GL.glDrawArrays(GL.GL_TRIANGLE_FAN, 0, self.vertex_count)
         
     # def resizeGL(self, w, h):
@@ -107,8 +108,8 @@ class GLWidget(qgl.QGLWidget):
 
     def gl_settings(self):
         # self.qglClearColor(qtg.QColor(255, 255, 255))
-        GL.glClearColor(255, 255, 255, 1)
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GLState.clear_color(255, 255, 255, 1)
+        GLState.enable(GL.GL_DEPTH_TEST)
         GL.glDepthFunc(GL.GL_LESS)
         # the shapes are basically behind the white background
         # if you enabled face culling, they will not show
@@ -22,6 +22,7 @@ if package_dir not in sys.path:
     sys.path.insert(0, package_dir)
 
 from core.utils import Utils
+from core.gl_state import GLState
 from core.attribute import Attribute
 
 class GLWidget(qgl.QGLWidget):
@@ -84,7 +85,7 @@ class GLWidget(qgl.QGLWidget):
         GL.glLineWidth(1)
         # Set up vertex array object #
         vao_ref = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(vao_ref)
+        GLState.bind_vertex_array(vao_ref)
 
         # Set up vertex attribute #
         vertices = [[-0.5, 0.5, 0.0],    # 0 position
@@ -106,7 +107,7 @@ class GLWidget(qgl.QGLWidget):
 
         # upload _data to GPU
         # Select first buffer for vertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.buffer_ref[0])
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, self.buffer_ref[0])
         GL.glBufferData(GL.GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data.ravel(), GL.GL_STATIC_DRAW)
         
         # associate the 'position' variable in the shader to the data above
@@ -120,7 +121,7 @@ class GLWidget(qgl.QGLWidget):
 
         # upload _data to GPU
         # Select second buffer for vertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.buffer_ref[1])
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, self.buffer_ref[1])
         GL.glBufferData(GL.GL_ARRAY_BUFFER, color_data.nbytes, color_data.ravel(), GL.GL_STATIC_DRAW)
         
         # associate the 'position' variable in the shader to the data above
@@ -134,7 +135,7 @@ class GLWidget(qgl.QGLWidget):
 
     def paintGL(self):
         self.clear()
-        GL.glUseProgram(self.program_ref)
+        GLState.use_program(self.program_ref)
         # we can now use vertex_count attribute instead of hardcoding it
         GL.glDrawArrays(GL.GL_TRIANGLES, 0, self.vertex_count)
         
@@ -143,8 +144,8 @@ class GLWidget(qgl.QGLWidget):
 
     def gl_settings(self):
         # self.qglClearColor(qtg.QColor(255, 255, 255))
-        GL.glClearColor(255, 255, 255, 1)
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GLState.clear_color(255, 255, 255, 1)
+        GLState.enable(GL.GL_DEPTH_TEST)
         GL.glDepthFunc(GL.GL_LESS)
         # the shapes are basically behind the white background
         # if you enabled face culling, they will not show
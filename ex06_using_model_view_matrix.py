@@ -23,6 +23,7 @@ if package_dir not in sys.path:
     sys.path.insert(0, package_dir)
 
 from core.utils import Utils
+from core.gl_state import GLState
 from core.uniform import Uniform
 from core.matrix import Matrix
 
@@ -67,7 +68,7 @@ class GLWidget(qgl.QGLWidget):
 
         # VAO - like container for VBOs
         vao_ref = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(vao_ref)
+        GLState.bind_vertex_array(vao_ref)
 
         # Set up vertex attribute #
         vertices = [[0.0,   0.2,  0.0],    # 0 position
@@ -83,7 +84,7 @@ class GLWidget(qgl.QGLWidget):
 
         # upload _data to GPU
         # Select first buffer for vertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.buffer_ref)
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, self.buffer_ref)
         GL.glBufferData(GL.GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data.ravel(), GL.GL_STATIC_DRAW)
         
         # associate the 'position' variable in the shader to the data above
@@ -101,7 +102,7 @@ class GLWidget(qgl.QGLWidget):
              [0, 1, 0, 0],
              [0, 0, 1, -1],
              [0, 0, 0, 1]]
-        ).astype(float)
+        ).astype(np.float32)
 
         self.m_matrix_ref = GL.glGetUniformLocation(self.program_ref, 'modelMatrix')
 
@@ -117,7 +118,7 @@ class GLWidget(qgl.QGLWidget):
              [0, d, 0, 0],
              [0, 0, b, c],
              [0, 0, -1, 0]]
-        ).astype(float)
+        ).astype(np.float32)
     
         self.p_matrix_ref = GL.glGetUniformLocation(self.program_ref, 'projectionMatrix')
 
@@ -127,7 +128,7 @@ class GLWidget(qgl.QGLWidget):
     
     def paintGL(self):
         self.clear()
-        GL.glUseProgram(self.program_ref)
+        GLState.use_program(self.program_ref)
 
         # the use of uniforms only works in the paintGL
         GL.glUniformMatrix4fv(self.m_matrix_ref, 1, GL.GL_TRUE, self.m_matrix)
@@ -140,8 +141,8 @@ class GLWidget(qgl.QGLWidget):
 
     def gl_settings(self):
         # self.qglClearColor(qtg.QColor(255, 255, 255))
-        GL.glClearColor(255, 255, 255, 1)
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GLState.clear_color(255, 255, 255, 1)
+        GLState.enable(GL.GL_DEPTH_TEST)
         GL.glDepthFunc(GL.GL_LESS)
         # the shapes are basically behind the white background
         # if you enabled face culling, they will not show
@@ -29,6 +29,7 @@ if package_dir not in sys.path:
     sys.path.insert(0, package_dir)
 
 from core.utils import Utils
+from core.gl_state import GLState
 from core.matrix import Matrix
 
 class GLWidget(qgl.QGLWidget):
@@ -83,6 +84,10 @@ class GLWidget(qgl.QGLWidget):
             }
         """
         self.program_ref = Utils.initialize_program(vs_code, fs_code)
+        # the program enumerated its uniforms when it was linked; look the locations up once here,
+        # not every frame in paintGL
+        self.mv_ref = self.program_ref.get_uniform_location('mvMatrix')
+        self.p_ref = self.program_ref.get_uniform_location('pMatrix')
 
         if Utils.is_macos_intel():
             GL.glLineWidth(1)
@@ -91,7 +96,7 @@ class GLWidget(qgl.QGLWidget):
 
         # VAO - like container for VBOs
         vao_ref = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(vao_ref)
+        GLState.bind_vertex_array(vao_ref)
 
         # color variable sfor reused
         c0 =  [0.3, 0.80, 0.1]
@@ -137,11 +142,11 @@ class GLWidget(qgl.QGLWidget):
 
         # upload _data to GPU
         # Select first buffer for vertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
         GL.glBufferData(GL.GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data, GL.GL_STATIC_DRAW)
 
         # activate and initialize index buffer object (IBO)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.index_buffer);
+        GLState.bind_buffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.index_buffer);
         # integers use 4 bytes in Java
         GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, index_data.nbytes, index_data, GL.GL_STATIC_DRAW)
 
@@ -174,18 +179,15 @@ class GLWidget(qgl.QGLWidget):
 
     def paintGL(self):
         self.clear()
-        GL.glUseProgram(self.program_ref)
-
-        mv_ref = GL.glGetUniformLocation(self.program_ref, 'mvMatrix')
-        p_ref = GL.glGetUniformLocation(self.program_ref, 'pMatrix')
+        GLState.use_program(self.program_ref)
 
         # the use of uniforms only works in the paintGL
         # OpenGL (and vectors) operate using column-major order. Therefore, if you're using row vectors, as in our examples,
         # you'll need to transpose the matrix first. Hence, the GL.GL_TRUE
         # for the 1D vectors, the transpose is implicit in the shader code
 
-        GL.glUniformMatrix4fv(mv_ref, 1, GL.GL_TRUE, self.mv_matrix)
-        GL.glUniformMatrix4fv(p_ref, 1, GL.GL_TRUE, self.p_matrix)
+        GL.glUniformMatrix4fv(self.mv_ref, 1, GL.GL_TRUE, self.mv_matrix)
+        GL.glUniformMatrix4fv(self.p_ref, 1, GL.GL_TRUE, self.p_matrix)
         
         # 24 because we have 8 triangles with 3 vertex each
         GL.glDrawElements(GL.GL_TRIANGLES, self.index_count, GL.GL_UNSIGNED_INT, buffer_offset(0));
@@ -195,8 +197,8 @@ class GLWidget(qgl.QGLWidget):
 
     def gl_settings(self):
         # self.qglClearColor(qtg.QColor(255, 255, 255))
-        GL.glClearColor(255, 255, 255, 1)
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GLState.clear_color(255, 255, 255, 1)
+        GLState.enable(GL.GL_DEPTH_TEST)
         GL.glDepthFunc(GL.GL_LESS)
         # the shapes are basically behind the white background
         # if you enabled face culling, they will not show
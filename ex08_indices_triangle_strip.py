@@ -23,6 +23,7 @@ if package_dir not in sys.path:
     sys.path.insert(0, package_dir)
 
 from core.utils import Utils
+from core.gl_state import GLState
 
 buffer_offset = ctypes.c_void_p
 
@@ -83,7 +84,7 @@ class GLWidget(qgl.QGLWidget):
 
         # VAO - like container for VBOs
         vao_ref = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(vao_ref)
+        GLState.bind_vertex_array(vao_ref)
 
         # color variable sfor reused
         c0 =  [0.3, 0.80, 0.1]
@@ -148,11 +149,11 @@ class GLWidget(qgl.QGLWidget):
 
         # upload _data to GPU
         # Select first buffer for vertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
         GL.glBufferData(GL.GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data, GL.GL_STATIC_DRAW)
 
         # activate and initialize index buffer object (IBO)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.index_buffer);
+        GLState.bind_buffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.index_buffer);
         # integers use 4 bytes in Java
         GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, index_data.nbytes, index_data, GL.GL_STATIC_DRAW)
 
@@ -201,7 +202,7 @@ class GLWidget(qgl.QGLWidget):
 
     def paintGL(self):
         self.clear()
-        GL.glUseProgram(self.program_ref)
+        GLState.use_program(self.program_ref)
 
         # the use of uniforms only works in the paintGL
         GL.glUniformMatrix4fv(0, 1, GL.GL_TRUE, self.m_matrix)
@@ -215,8 +216,8 @@ class GLWidget(qgl.QGLWidget):
 
     def gl_settings(self):
         # self.qglClearColor(qtg.QColor(255, 255, 255))
-        GL.glClearColor(255, 255, 255, 1)
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GLState.clear_color(255, 255, 255, 1)
+        GLState.enable(GL.GL_DEPTH_TEST)
         GL.glDepthFunc(GL.GL_LESS)
         # the shapes are basically behind the white background
         # if you enabled face culling, they will not show
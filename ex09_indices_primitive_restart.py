@@ -22,6 +22,8 @@ print("parent dir: ", package_dir)
 if package_dir not in sys.path:
     sys.path.insert(0, package_dir)
 
+from core.gl_state import GLState
+from core.index_buffer import IndexBuffer
 from core.utils import Utils
 
 buffer_offset = ctypes.c_void_p
@@ -83,7 +85,7 @@ class GLWidget(qgl.QGLWidget):
 
         # VAO - like container for VBOs
         vao_ref = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(vao_ref)
+        GLState.bind_vertex_array(vao_ref)
 
         # color variable sfor reused
         c0 =  [0.3, 0.80, 0.1]
@@ -118,27 +120,24 @@ class GLWidget(qgl.QGLWidget):
                 3
         ]
         
-        # index_count is correct at 24 since indices are not list of list
-        self.index_count = len(indices)
-
         self.vertex_buffer = GL.glGenBuffers(1)
-        self.index_buffer = GL.glGenBuffers(1)
 
         # convert to numpy array - for convenience
         vertex_data= np.array(vertices).astype(np.float32)
-        index_data= np.array(indices).astype(np.uint32)
 
-        self.enable_primitive_restart(99)
+        # the largest index is 8, so the indices are stored as uint8;
+        # the restart tag 99 is replaced by 255, the largest uint8 value
+        self.index_buffer = IndexBuffer(indices, restart_tag=99)
+
+        self.index_buffer.enable_primitive_restart()
 
         # upload _data to GPU
         # Select first buffer for vertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        GLState.bind_buffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
         GL.glBufferData(GL.GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data, GL.GL_STATIC_DRAW)
 
-        # activate and initialize index buffer object (IBO)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.index_buffer);
-        # integers use 4 bytes in Java
-        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, index_data.nbytes, index_data, GL.GL_STATIC_DRAW)
+        # activate index buffer object (IBO); the VAO records the binding
+        self.index_buffer.bind()
 
         stride = int(6*32/8) # 6 values with 32 bits each, divide 8 to get bytes
         color_offset = int(3*32/8) # the first 3 values are to be skipped since they are for position
@@ -185,22 +184,22 @@ class GLWidget(qgl.QGLWidget):
 
     def paintGL(self):
         self.clear()
-        GL.glUseProgram(self.program_ref)
+        GLState.use_program(self.program_ref)
 
         # the use of uniforms only works in the paintGL
         GL.glUniformMatrix4fv(0, 1, GL.GL_TRUE, self.m_matrix)
         GL.glUniformMatrix4fv(1, 1, GL.GL_TRUE, self.p_matrix)
         
-        # index count is 13 with the primitive restart
-        GL.glDrawElements(GL.GL_TRIANGLE_STRIP, self.index_count, GL.GL_UNSIGNED_INT, buffer_offset(0));
+        # index count is 13 with the primitive restart; the index buffer knows its count and type
+        self.index_buffer.draw(GL.GL_TRIANGLE_STRIP)
         
     # def resizeGL(self, w, h):
     #     pass
 
     def gl_settings(self):
         # self.qglClearColor(qtg.QColor(255, 255, 255))
-        GL.glClearColor(255, 255, 255, 1)
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GLState.clear_color(255, 255, 255, 1)
+        GLState.enable(GL.GL_DEPTH_TEST)
         GL.glDepthFunc(GL.GL_LESS)
         # the shapes are basically behind the white background
         # if you enabled face culling, they will not show
@@ -209,10 +208,6 @@ class GLWidget(qgl.QGLWidget):
     def clear(self):
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
 
-    def enable_primitive_restart(self, restart_index=99):
-        GL.glEnable(GL.GL_PRIMITIVE_RESTART);
-        GL.glPrimitiveRestartIndex(restart_index);
-
 class MainWindow(qtw.QMainWindow):
 
     def __init__(self, *args):
@@ -7,7 +7,7 @@
 import time
 import sys
 from pathlib import Path
-import math, ctypes
+import math
 
 import numpy as np
 import PyQt5.QtWidgets as qtw
@@ -19,7 +19,6 @@ from PyQt5.uic import loadUi
 from PyQt5.QtCore import pyqtSlot
 
 import OpenGL.GL as GL
-from OpenGL import GLU
 
 package_dir = str(Path(__file__).resolve().parents[1])
 print("parent dir: ", package_dir)
@@ -27,12 +26,16 @@ print("parent dir: ", package_dir)
 if package_dir not in sys.path:
     sys.path.insert(0, package_dir)
 
+from core.camera import Camera
+from core.gl_state import GLState
+from core.index_buffer import IndexBuffer
 from core.matrix import Matrix
+from core.resources import ResourceRegistry
 from core.utils import Utils
+from core.vertex_array import VertexArray
+from core.vertex_layout import VertexLayout
 from core_ext.cuboid import Cuboid
 
-buffer_offset = ctypes.c_void_p
-
 class GLWidget(qgl.QGLWidget):
 
     def __init__(self, main_window=None, *__args):
@@ -90,85 +93,78 @@ class GLWidget(qgl.QGLWidget):
 
         GL.glLineWidth(4)
 
-        # VAO - like container for VBOs
-        vao_ref = GL.glGenVertexArrays(1)
-        GL.glBindVertexArray(vao_ref)
-
         # color variable sfor reused
         color =  [0.15, 0.20, 0.75]
 
         cube_vertices = Cuboid.make_cuboid_fast_vertices(0.9, 0.9, 0.9, color);
         cube_indices = Cuboid.make_cuboid_fast_indices_for_triangle_strip()
         
-        # index_count is correct at 24 since indices are not list of list
-        self.index_count = len(cube_indices)
-
-        self.vertex_buffer = GL.glGenBuffers(1)
-        self.index_buffer = GL.glGenBuffers(1)
+        # position and color are interleaved per vertex; the layout derives stride and offsets
+        self.vertex_layout = VertexLayout([("vPosition", "vec3"), ("vColor", "vec3")])
 
         # convert to numpy array - for convenience
-        vertex_data= np.array(cube_vertices).astype(np.float32)
-        index_data= np.array(cube_indices).astype(np.uint32)
+        vertex_data = self.vertex_layout.from_interleaved(cube_vertices)
 
         # upload _data to GPU
-        # Select first buffer for cube_vertices
-        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
-        GL.glBufferData(GL.GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data, GL.GL_STATIC_DRAW)
+        self.vertex_buffer = self.vertex_layout.upload_data(vertex_data)
 
-        # activate and initialize index buffer object (IBO)
-        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.index_buffer);
-        # integers use 4 bytes in Java
-        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, index_data.nbytes, index_data, GL.GL_STATIC_DRAW)
+        # index buffer object (IBO); 14 indices below 8 are stored as uint8
+        self.index_buffer = IndexBuffer(cube_indices)
 
-        stride = int(6*32/8) # 6 values with 32 bits each, divide 8 to get bytes
-        color_offset = int(3*32/8) # the first 3 values are to be skipped since they are for position
-        
-        # Specify how data will be read from the currently bound buffer into the specified variable
-        # 3 since we are using vec3 to represent each vertex
-        GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, False, stride, buffer_offset(0))
-        # Indicate that data will be streamed to this variable
-        GL.glEnableVertexAttribArray(0)
-
-        # Specify how data will be read from the currently bound buffer into the specified variable
-        # 3 since we are using vec3 to represent each vertex
-        GL.glVertexAttribPointer(1, 3, GL.GL_FLOAT, False, stride, buffer_offset(color_offset))
-        # Indicate that data will be streamed to this variable
-        GL.glEnableVertexAttribArray(1)
+        # VAO - records the vertex buffer bindings and the index buffer once;
+        # drawing the cuboid then only needs a single bind
+        self.vertex_array = VertexArray(self.program_ref)
+        # Specify how data will be read from the vertex buffer into vPosition and vColor
+        self.vertex_array.add_vertex_layout(self.vertex_layout, self.vertex_buffer)
+        self.vertex_array.set_index_buffer(self.index_buffer)
 
         # Set up model matrix
         # move -1 units i z direction (z is direction to screen)
-        self.m_matrix = Matrix.make_translation(0, 0, -1)
+        # float32 is the format glUniformMatrix4fv uploads, so paintGL sends these without conversion
+        self.m_matrix = Matrix.make_translation(0, 0, -1, dtype=np.float32)
 
-        # set up prospective matrix
-        self.p_matrix = Matrix.make_perspective()
-
-        self.eye_matrix = Matrix.make_identity()
+        # set up the camera; it caches the perspective matrix and only rebuilds it on resize
+        self.camera = Camera()
+        self.mv_matrix = np.empty((4, 4), dtype=np.float32)
 
     def paintGL(self):
+        # count the GL calls GLState skips per frame (the program and VAO binds after the first frame)
+        GLState.begin_frame()
         self.clear()
-        GL.glUseProgram(self.program_ref)
+        GLState.use_program(self.program_ref)
+
+        # model-view = view * model, written into a preallocated buffer
+        np.matmul(self.camera.view_matrix, self.m_matrix, out=self.mv_matrix)
 
         # the use of uniforms only works in the paintGL
-        GL.glUniformMatrix4fv(0, 1, GL.GL_TRUE, self.m_matrix)
-        GL.glUniformMatrix4fv(1, 1, GL.GL_TRUE, self.p_matrix)
+        # locations follow the shader: 0 is pMatrix, 1 is mvMatrix
+        GL.glUniformMatrix4fv(0, 1, GL.GL_TRUE, self.camera.projection_matrix)
+        GL.glUniformMatrix4fv(1, 1, GL.GL_TRUE, self.mv_matrix)
         
-        # index count is 11 & 13 for the 1st and 2nd version respectively
-        GL.glDrawElements(GL.GL_TRIANGLE_STRIP, self.index_count, GL.GL_UNSIGNED_INT, buffer_offset(0));
+        self.vertex_array.bind()
+        # the index buffer knows its count (14) and index type
+        self.index_buffer.draw(GL.GL_TRIANGLE_STRIP)
         
+    def release_gl(self):
+        # free the GPU objects while the context still exists, then list anything left behind
+        self.makeCurrent()
+        self.vertex_array.delete()
+        ResourceRegistry.delete_buffer(self.vertex_buffer)
+        self.index_buffer.delete()
+        Utils.delete_program(self.program_ref)
+        ResourceRegistry.report_leaks()
+        self.doneCurrent()
+
     def resizeGL(self, width, height):
         GL.glViewport(0, 0, width, height)
-        GL.glMatrixMode(GL.GL_PROJECTION)
-        GL.glLoadIdentity()
-        aspect = width / float(height)
-
-        # gluPerspective(field_of_view, aspect_ratio, z_near, z_far)
-        GLU.gluPerspective(45.0, aspect, 1.0, 100.0)
-        GL.glMatrixMode(GL.GL_MODELVIEW)
+        # the legacy glMatrixMode/gluPerspective calls have no effect on core-profile shaders;
+        # the camera rebuilds its projection matrix on the next paintGL instead
+        self.camera.aspect_ratio = width / float(max(height, 1))
 
     def gl_settings(self):
         # self.qglClearColor(qtg.QColor(255, 255, 255))
-        GL.glClearColor(255, 255, 255, 1)
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GLState.clear_color(255, 255, 255, 1)
+        GLState.enable(GL.GL_DEPTH_TEST)
         GL.glDepthFunc(GL.GL_LESS)
         # the shapes are basically behind the white background
         # if you enabled face culling, they will not show
@@ -223,5 +219,6 @@ qtw.QApplication.setAttribute(qtc.Qt.AA_UseHighDpiPixmaps, True)        # use hi
 app = qtw.QApplication(sys.argv)
 
 window = MainWindow()
+app.aboutToQuit.connect(window.glWidget.release_gl)
 window.show()
 sys.exit(app.exec_())
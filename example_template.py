@@ -20,6 +20,7 @@ print("parent dir: ", package_dir)
 if package_dir not in sys.path:
     sys.path.insert(0, package_dir)
 
+from core.gl_state import GLState
 from core.utils import Utils
 
 
@@ -48,6 +49,8 @@ class GLWidget(qgl.QGLWidget):
         self.gl_settings()
 
     def paintGL(self):
+        # count the GL calls GLState skips per frame
+        GLState.begin_frame()
         self.clear()
         
         # time update
@@ -58,8 +61,8 @@ class GLWidget(qgl.QGLWidget):
 
     def gl_settings(self):
         # self.qglClearColor(qtg.QColor(255, 255, 255))
-        GL.glClearColor(255, 255, 255, 1)
-        GL.glEnable(GL.GL_DEPTH_TEST)
+        GLState.clear_color(255, 255, 255, 1)
+        GLState.enable(GL.GL_DEPTH_TEST)
         GL.glDepthFunc(GL.GL_LESS)
         # the shapes are basically behind the white background
         # if you enabled face culling, they will not show
@@ -68,8 +71,8 @@ class GLWidget(qgl.QGLWidget):
     def clear(self):
         # Clearing the screen (color like Qt window)
         # GL.glClearColor(0.94117647058, 0.94117647058, 0.94117647058, 1.0)
-        # sometimes not needed
-        GL.glClearColor(255, 255, 255, 1)
+        # sometimes not needed; GLState skips it while the color is unchanged
+        GLState.clear_color(255, 255, 255, 1)
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
 
 class MainWindow(qtw.QMainWindow):